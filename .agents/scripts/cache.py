@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Persistent frontmatter cache for AGD files.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Parsed frontmatter is stored in .agents/.cache/frontmatter.json, keyed by file
+name plus (mtime_ns, size, inode). Unchanged files are loaded from the cache,
+changed files are reparsed. A missing, corrupt or outdated cache is rebuilt.
+
+Set AGENT_CENTRIC_CACHE_STATS=1 to print hit/miss counts to stderr (they are
+also part of the AGENT_CENTRIC_STATS output, see stats.py).
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from stats import STATS
+from utils import atomic_write_text, get_cache_dir, parallel_map, read_frontmatter
+
+CACHE_VERSION = 1
+CACHE_FILE = 'frontmatter.json'
+STATS_ENV = 'AGENT_CENTRIC_CACHE_STATS'
+
+
+def file_signature(path: Path) -> list[int]:
+    """Return the cache key for a file: [mtime_ns, size, inode]."""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+class ParseCache:
+    """On-disk cache of parsed AGD frontmatter."""
+
+    def __init__(self, project_dir: Path):
+        self.path = get_cache_dir(project_dir) / CACHE_FILE
+        self.dirty = False
+        with STATS.phase('cache'):
+            self.entries: dict[str, list] = self._load()
+        self.seen: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict[str, list]:
+        """Load cache entries, returning an empty cache if unusable."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+            self.dirty = True
+            return {}
+        entries = data.get('entries')
+        if not isinstance(entries, dict):
+            self.dirty = True
+            return {}
+        return entries
+
+    def _probe(self, agd_file: Path) -> tuple[list[int], dict[str, str], bool]:
+        """Stat agd_file and parse it unless the cached entry is current.
+
+        Returns (signature, frontmatter, hit). Only reads cache state, so it
+        is safe to call from several threads at once.
+        """
+        signature = file_signature(agd_file)
+        entry = self.entries.get(agd_file.name)
+        if (isinstance(entry, list) and len(entry) == 2
+                and entry[0] == signature and isinstance(entry[1], dict)):
+            return signature, entry[1], True
+        return signature, read_frontmatter(agd_file), False
+
+    def _record(self, name: str, signature: list[int], frontmatter: dict[str, str], hit: bool) -> None:
+        self.seen.add(name)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.entries[name] = [signature, frontmatter]
+            self.dirty = True
+
+    def load(self, agd_file: Path) -> tuple[list[int], dict[str, str]]:
+        """Return (signature, frontmatter) for agd_file, reparsing only if it changed.
+
+        Raises OSError if the file cannot be read and ValueError if its
+        frontmatter cannot be decoded.
+        """
+        self.seen.add(agd_file.name)
+        signature, frontmatter, hit = self._probe(agd_file)
+        self._record(agd_file.name, signature, frontmatter, hit)
+        return signature, frontmatter
+
+    def load_many(self, agd_files: list[Path], workers: int = 0) -> list[tuple[list[int], dict[str, str]] | Exception]:
+        """load() for many files, stat'ing and parsing on `workers` threads.
+
+        Returns one result per file, in input order; files that cannot be
+        read or decoded yield their OSError/ValueError instead of raising.
+        Cache updates are applied afterwards in input order, so the result
+        does not depend on the number of workers.
+        """
+        def probe(agd_file: Path):
+            try:
+                return self._probe(agd_file)
+            except (OSError, ValueError) as e:
+                return e
+
+        results = []
+        for agd_file, result in zip(agd_files, parallel_map(probe, agd_files, workers)):
+            self.seen.add(agd_file.name)
+            if isinstance(result, Exception):
+                results.append(result)
+                continue
+            signature, frontmatter, hit = result
+            self._record(agd_file.name, signature, frontmatter, hit)
+            results.append((signature, frontmatter))
+        return results
+
+    def save(self) -> None:
+        """Write the cache back if anything changed, dropping removed files."""
+        stale = [name for name in self.entries if name not in self.seen]
+        for name in stale:
+            del self.entries[name]
+        if stale:
+            self.dirty = True
+
+        if os.environ.get(STATS_ENV):
+            print(f"cache: {self.hits} hits, {self.misses} misses ({self.path})", file=sys.stderr)
+        if STATS.enabled:
+            STATS.count('cache_hits', self.hits)
+            STATS.count('cache_misses', self.misses)
+
+        if not self.dirty:
+            return
+
+        with STATS.phase('cache'):
+            try:
+                atomic_write_text(self.path, json.dumps({'version': CACHE_VERSION, 'entries': self.entries},
+                                                        separators=(',', ':')))
+            except OSError:
+                # The cache is an optimization; failing to persist it is not an error
+                pass
+        self.dirty = False
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+In-memory AGD corpus shared by validation and index generation.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Usage from other tools:
+    from corpus import load_corpus
+
+    corpus = load_corpus(project_dir)
+    for record in corpus.records:
+        print(record.agd_id, record.frontmatter.get('title'))
+"""
+
+import os
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+
+from cache import ParseCache, file_signature
+from fingerprint import corpus_fingerprint
+from utils import (
+    DECISIONS_DIR,
+    MAX_LOADER_THREADS,
+    AgdResolver,
+    get_agd_id,
+    get_agents_dir,
+    get_decisions_dir,
+    load_config,
+    parallel_map,
+    read_frontmatter,
+    worker_count,
+)
+
+
+@dataclass
+class AgdRecord:
+    """A single AGD file and its parsed frontmatter."""
+
+    path: Path
+    frontmatter: dict[str, str] = field(default_factory=dict)
+    error: str | None = None
+    signature: list[int] | None = None  # [mtime_ns, size, inode] when loaded
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def agd_id(self) -> str | None:
+        return get_agd_id(self.path.name)
+
+    @property
+    def relative_path(self) -> str:
+        """Path relative to .agents/, as used in index files."""
+        return f"{DECISIONS_DIR}/{self.path.name}"
+
+
+@dataclass(frozen=True)
+class AgdError:
+    """A validation error; str() gives the "<file>: <message>" text form."""
+
+    file: str                   # AGD file name (or the file a relation error is reported on, or a source file)
+    kind: str                   # e.g. 'invalid_tag', 'missing_reference', 'relation_cycle'
+    message: str
+    field: str | None = None    # Frontmatter field, if the error concerns one
+    value: str | None = None    # Offending tag, reference or AGD ID
+    project: str | None = None  # Project path in --workspace runs
+    line: int | None = None     # Line in file, for citations in source code
+
+    def __str__(self) -> str:
+        prefix = f"{self.project}: " if self.project else ''
+        location = f"{self.file}:{self.line}" if self.line else self.file
+        return f"{prefix}{location}: {self.message}"
+
+    def to_dict(self) -> dict:
+        return {'project': self.project, 'file': self.file, 'line': self.line, 'field': self.field,
+                'kind': self.kind, 'value': self.value, 'message': self.message}
+
+
+@dataclass
+class Corpus:
+    """All AGD files of a project, loaded with one directory pass."""
+
+    project_dir: Path
+    agents_dir: Path
+    decisions_dir: Path
+    config: dict
+    resolver: AgdResolver
+    records: list[AgdRecord]
+    fingerprint: str = ''  # corpus_fingerprint() taken before the files were read; '' if unknown
+
+    @property
+    def exists(self) -> bool:
+        return self.decisions_dir.exists()
+
+    @property
+    def allowed_tags(self) -> list[str]:
+        return self.config.get('tags', [])
+
+    @cached_property
+    def graph(self):
+        """Relation graph (see graph.py), built on first use."""
+        from graph import RelationGraph
+        return RelationGraph.build(self)
+
+    @cached_property
+    def code_refs(self) -> dict[str, list[list]]:
+        """AGD citations in source code (see code_refs.py), scanned on first use."""
+        from code_refs import scan_code_refs
+        return scan_code_refs(self.project_dir, self.config)
+
+
+def _read_file(agd_file: Path) -> tuple[list[int], dict[str, str]] | Exception:
+    try:
+        return file_signature(agd_file), read_frontmatter(agd_file)
+    except (OSError, ValueError) as e:
+        return e
+
+
+def load_corpus(project_dir: Path, use_cache: bool = True, fingerprint: str | None = None) -> Corpus:
+    """Load config and every AGD file of project_dir into memory.
+
+    Files are listed once and ordered by AGD number. Unreadable files are kept
+    as records with `error` set so validation can report them. Large corpora
+    are read on a thread pool (see `loaderThreads` in config.json); records
+    are identical to a serial load.
+
+    The corpus fingerprint is taken before reading, so that caches stamped
+    with it go stale if a file changes during the load; pass fingerprint if
+    the caller has just computed it.
+    """
+    if fingerprint is None:
+        fingerprint = corpus_fingerprint(project_dir)
+    agents_dir = get_agents_dir(project_dir)
+    decisions_dir = get_decisions_dir(project_dir)
+    config = load_config(agents_dir / 'config.json') or {}
+    resolver = AgdResolver(decisions_dir)
+
+    workers = worker_count(config, 'loaderThreads', len(resolver.files),
+                           default=min(MAX_LOADER_THREADS, os.cpu_count() or 1))
+    if use_cache:
+        cache = ParseCache(project_dir)
+        results = cache.load_many(resolver.files, workers)
+        cache.save()
+    else:
+        results = parallel_map(_read_file, resolver.files, workers)
+
+    records = []
+    for agd_file, result in zip(resolver.files, results):
+        if isinstance(result, Exception):
+            records.append(AgdRecord(agd_file, error=str(result)))
+        else:
+            signature, frontmatter = result
+            records.append(AgdRecord(agd_file, frontmatter, signature=signature))
+
+    return Corpus(project_dir, agents_dir, decisions_dir, config, resolver, records, fingerprint)
+
+
+def refresh_corpus(corpus: Corpus, changed: set[str], relist: bool = True, reload_config: bool = False) -> Corpus:
+    """Return an updated corpus, re-reading only the files named in changed.
+
+    Used by long-running processes that learn about changes from file system
+    events. With relist=False the previous directory listing is reused (only
+    file contents changed, no files were added, removed or renamed).
+    """
+    fingerprint = corpus_fingerprint(corpus.project_dir)
+    config = corpus.config
+    if reload_config:
+        config = load_config(corpus.agents_dir / 'config.json') or {}
+    resolver = AgdResolver(corpus.decisions_dir) if relist else corpus.resolver
+
+    previous = {record.name: record for record in corpus.records}
+    records = []
+    for agd_file in resolver.files:
+        record = previous.get(agd_file.name)
+        if record is None or agd_file.name in changed:
+            try:
+                record = AgdRecord(agd_file, read_frontmatter(agd_file), signature=file_signature(agd_file))
+            except (IOError, ValueError) as e:
+                record = AgdRecord(agd_file, error=str(e))
+        records.append(record)
+
+    return Corpus(corpus.project_dir, corpus.agents_dir, corpus.decisions_dir, config, resolver, records,
+                  fingerprint)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+AGDs changed since a git revision, for `--since <rev>` runs in CI and
+pre-commit hooks.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Only local git commands are used:
+    - git diff --name-status <rev>:   added, modified, renamed and deleted
+                                      decision files (working tree vs rev)
+    - git ls-files --others:          new files not yet added to git
+    - git grep:                       files mentioning a given AGD ID
+    - git cat-file --batch:           frontmatter of changed files at rev
+
+From the changed files, load_changes() collects every AGD connected to them
+by references (obsoletes, updates, obsoleted_by, updated_by), now or at rev,
+and parses only those. Checks and index lines outside that set cannot have
+changed, assuming the tree at rev was valid and its indexes current.
+"""
+
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+from corpus import AgdRecord, Corpus
+from utils import (
+    AGENTS_DIR,
+    DECISIONS_DIR,
+    REF_FIELDS,
+    AgdResolver,
+    get_agd_id,
+    get_agents_dir,
+    get_decisions_dir,
+    is_agd_filename,
+    load_config,
+    parse_frontmatter,
+    read_frontmatter,
+)
+
+DECISIONS_PATH = f"{AGENTS_DIR}/{DECISIONS_DIR}"
+
+
+class GitError(Exception):
+    """A git command failed (not a repository, unknown revision, ...)."""
+
+
+@dataclass
+class ChangeSet:
+    """Decision files changed since a revision and the AGDs related to them."""
+
+    corpus: Corpus           # Full directory listing, but records only for `related`
+    changed: set[str]        # Added, modified or renamed-to files that exist now
+    removed: set[str]        # Deleted or renamed-from files
+    referrers: set[str]      # Files whose references mention a changed or removed AGD ID
+    related: set[str]        # Every existing AGD connected to a change (records in corpus)
+
+    @property
+    def affected(self) -> set[str]:
+        """Sources whose tag and relation index lines may differ from rev."""
+        return self.changed | self.removed | self.referrers
+
+
+def _git(project_dir: Path, args: list[str], stdin: str | None = None) -> str:
+    try:
+        result = subprocess.run(['git', '-C', str(project_dir), *args], input=stdin,
+                                capture_output=True, text=True)
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}") from e
+    if result.returncode not in (0, 1) or (result.returncode == 1 and result.stderr):
+        raise GitError(result.stderr.strip() or f"git {args[0]} failed")
+    return result.stdout
+
+
+def _decision_name(path: str) -> str | None:
+    """File name if path is an AGD file directly in the decisions directory."""
+    directory, _, name = path.rpartition('/')
+    return name if directory == DECISIONS_PATH and is_agd_filename(name) else None
+
+
+def changed_decisions(project_dir: Path, rev: str) -> tuple[set[str], set[str]]:
+    """(changed, removed) AGD file names between rev and the working tree."""
+    try:
+        _git(project_dir, ['rev-parse', '--verify', f"{rev}^{{commit}}"])
+    except GitError as e:
+        raise GitError(f"{e} ({rev})") from None
+    out = _git(project_dir, ['diff', '--name-status', '-z', '-M', '--relative', rev, '--', DECISIONS_PATH])
+    fields = out.split('\0')
+    changed = set()
+    removed = set()
+    i = 0
+    while i < len(fields) - 1:
+        status = fields[i]
+        if status[:1] in ('R', 'C'):
+            old, new = fields[i + 1], fields[i + 2]
+            i += 3
+            if status[0] == 'R' and (name := _decision_name(old)):
+                removed.add(name)
+        else:
+            new = fields[i + 1]
+            i += 2
+            if status[:1] == 'D':
+                if name := _decision_name(new):
+                    removed.add(name)
+                continue
+        if name := _decision_name(new):
+            changed.add(name)
+
+    out = _git(project_dir, ['ls-files', '-z', '--others', '--exclude-standard', '--', DECISIONS_PATH])
+    changed.update(name for path in out.split('\0') if (name := _decision_name(path)))
+    return changed, removed
+
+
+def grep_referrers(project_dir: Path, agd_ids: set[str]) -> set[str]:
+    """AGD files mentioning any of agd_ids (a superset of those referencing them)."""
+    if not agd_ids:
+        return set()
+    out = _git(project_dir, ['grep', '-l', '-z', '--untracked', '-F', '-f', '-', '--', DECISIONS_PATH],
+               stdin=''.join(f"{agd_id}\n" for agd_id in sorted(agd_ids)))
+    return {name for path in out.split('\0') if (name := _decision_name(path))}
+
+
+def frontmatter_at(project_dir: Path, rev: str, names: set[str]) -> dict[str, dict[str, str]]:
+    """Frontmatter of decision files as of rev (files missing there are omitted)."""
+    if not names:
+        return {}
+    order = sorted(names)
+    out = subprocess.run(['git', '-C', str(project_dir), 'cat-file', '--batch'],
+                         input=''.join(f"{rev}:./{DECISIONS_PATH}/{name}\n" for name in order).encode(),
+                         capture_output=True)
+    if out.returncode != 0:
+        raise GitError(out.stderr.decode(errors='replace').strip() or "git cat-file failed")
+
+    result = {}
+    data = out.stdout
+    pos = 0
+    for name in order:
+        end = data.index(b'\n', pos)
+        header = data[pos:end].split()
+        pos = end + 1
+        if len(header) < 3 or header[-1] == b'missing':
+            continue
+        size = int(header[2])
+        result[name] = parse_frontmatter(data[pos:pos + size].decode(errors='replace'))
+        pos += size + 1
+    return result
+
+
+def _ref_ids(frontmatter: dict[str, str]) -> set[str]:
+    return {agd_id for field in REF_FIELDS for ref in frontmatter.get(field, '').split(',')
+            if (agd_id := get_agd_id(ref.strip()))}
+
+
+def load_changes(project_dir: Path, rev: str) -> ChangeSet:
+    """Find the changes since rev and parse the AGDs connected to them."""
+    agents_dir = get_agents_dir(project_dir)
+    resolver = AgdResolver(get_decisions_dir(project_dir))
+    existing = {path.name for path in resolver.files}
+    changed, removed = changed_decisions(project_dir, rev)
+    changed &= existing
+
+    parsed: dict[str, AgdRecord] = {}
+
+    def parse(name: str) -> AgdRecord:
+        if name not in parsed:
+            path = resolver.decisions_dir / name
+            try:
+                parsed[name] = AgdRecord(path, read_frontmatter(path))
+            except (OSError, ValueError) as e:
+                parsed[name] = AgdRecord(path, error=str(e))
+        return parsed[name]
+
+    def targets(frontmatter: dict[str, str]) -> set[str]:
+        return {path.name for agd_id in _ref_ids(frontmatter) if (path := resolver.by_id.get(agd_id))}
+
+    def referencing(names: set[str]) -> set[str]:
+        """Existing AGDs whose reference fields name the ID of one of names."""
+        ids = {agd_id for name in names if (agd_id := get_agd_id(name))}
+        return {name for name in grep_referrers(project_dir, ids) & existing
+                if _ref_ids(parse(name).frontmatter) & ids}
+
+    referrers = referencing(changed | removed)
+
+    # Relations a changed file had at rev may have ended: include their targets
+    pending = changed | referrers
+    for frontmatter in frontmatter_at(project_dir, rev, changed | removed).values():
+        pending |= targets(frontmatter)
+
+    # Grow to the whole connected component, so cycles and reverse fields are
+    # checked exactly as a full run would
+    related: set[str] = set()
+    while pending:
+        batch = pending - related
+        related |= batch
+        pending = referencing(batch)
+        for name in batch:
+            pending |= targets(parse(name).frontmatter)
+        pending -= related
+
+    records = [parse(path.name) for path in resolver.files if path.name in related]
+    corpus = Corpus(project_dir, agents_dir, resolver.decisions_dir,
+                    load_config(agents_dir / 'config.json') or {}, resolver, records)
+    return ChangeSet(corpus, changed, removed, referrers, related)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Relation graph over all AGDs: effective status, supersession and consistency.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Built once per run from the forward fields (obsoletes, updates) and the
+reverse fields (obsoleted_by, updated_by) of every AGD. Provides:
+    - status(name):  'obsoleted' if anything obsoletes the AGD, else
+                     'updated' if anything updates it, else 'active'
+    - latest(name):  newest AGD superseding it through any chain of
+                     obsoletes/updates, preferring ones not obsoleted themselves
+    - errors():      relation cycles, and reverse declarations that do not
+                     match the forward edges of the other AGD
+
+Reverse fields are optional: `A obsoletes B` without `obsoleted_by: A` on B
+is fine, but if B declares obsoleted_by it must list A, and every AGD it
+lists must declare the forward relation.
+"""
+
+from corpus import AgdError, Corpus
+from utils import (
+    REL_OBSOLETES,
+    REL_UPDATES,
+    RELATION_FIELDS,
+    REVERSE_RELATION_FIELDS,
+    get_agd_id,
+    get_agd_sort_key,
+)
+
+REL_NAMES = {field_rel: field for field, field_rel in RELATION_FIELDS}
+REVERSE_NAMES = {field_rel: field for field, field_rel in REVERSE_RELATION_FIELDS}
+
+STATUS_OBSOLETED = 'obsoleted'
+STATUS_UPDATED = 'updated'
+STATUS_ACTIVE = 'active'
+
+
+def _order(name: str) -> tuple[int, str]:
+    return get_agd_sort_key(name), name
+
+
+class RelationGraph:
+    """Supersession edges between AGD file names (source obsoletes/updates target)."""
+
+    def __init__(self, names: list[str], forward: set[tuple[str, str, str]],
+                 reverse: set[tuple[str, str, str]], reverse_fields: dict[str, set[str]]):
+        self.names = names
+        self.forward = forward              # (source, rel_type, target) from obsoletes/updates
+        self.reverse = reverse              # (source, rel_type, target) from obsoleted_by/updated_by on target
+        self.reverse_fields = reverse_fields  # name -> rel_types whose reverse field it declares
+        self.superseded_by: dict[str, list[tuple[str, str]]] = {}
+        for source, rel_type, target in sorted(forward | reverse):
+            self.superseded_by.setdefault(target, []).append((rel_type, source))
+        self._status = {}
+        for target, edges in self.superseded_by.items():
+            rel_types = {rel_type for rel_type, _ in edges}
+            self._status[target] = (STATUS_OBSOLETED if REL_OBSOLETES in rel_types
+                                    else STATUS_UPDATED if REL_UPDATES in rel_types else STATUS_ACTIVE)
+        self._latest: dict[str, str | None] | None = None
+        self._cycles: list[list[str]] | None = None
+
+    @classmethod
+    def build(cls, corpus: Corpus) -> 'RelationGraph':
+        names = []
+        forward = set()
+        reverse = set()
+        reverse_fields: dict[str, set[str]] = {}
+        for record in corpus.records:
+            if record.error:
+                continue
+            names.append(record.name)
+            for fields, edges in ((RELATION_FIELDS, forward), (REVERSE_RELATION_FIELDS, reverse)):
+                for field, rel_type in fields:
+                    refs = record.frontmatter.get(field, '')
+                    if not refs.strip():
+                        continue
+                    if fields is REVERSE_RELATION_FIELDS:
+                        reverse_fields.setdefault(record.name, set()).add(rel_type)
+                    for ref in (r.strip() for r in refs.split(',') if r.strip()):
+                        other = corpus.resolver.resolve(ref)
+                        if other is None:
+                            continue  # Reported by validate_references()
+                        if edges is forward:
+                            edges.add((record.name, rel_type, other.name))
+                        else:
+                            edges.add((other.name, rel_type, record.name))
+        return cls(names, forward, reverse, reverse_fields)
+
+    def status(self, name: str) -> str:
+        return self._status.get(name, STATUS_ACTIVE)
+
+    def latest(self, name: str) -> str | None:
+        """Newest AGD reachable through superseding edges, or None."""
+        if self._latest is None:
+            self._compute()
+        return self._latest.get(name)
+
+    def cycles(self) -> list[list[str]]:
+        """Groups of AGDs that (transitively) supersede each other."""
+        if self._cycles is None:
+            self._compute()
+        return self._cycles
+
+    def _compute(self) -> None:
+        """Find strongly connected components (Tarjan, iterative) and
+        propagate the newest superseding AGD through the condensed DAG.
+
+        Components come out sinks first, so everything reachable from a
+        component is final when the component itself is processed.
+        """
+        successors = {name: [source for _, source in edges] for name, edges in self.superseded_by.items()}
+        index: dict[str, int] = {}
+        lowlink: dict[str, int] = {}
+        on_stack: set[str] = set()
+        stack: list[str] = []
+        component_of: dict[str, int] = {}
+        # Per component: newest non-obsoleted / newest any member reachable (including itself)
+        reach_active: list[str | None] = []
+        reach_any: list[str | None] = []
+        self._latest = {}
+        self._cycles = []
+
+        keys: dict[str, tuple[int, str]] = {}
+
+        def key(name: str) -> tuple[int, str]:
+            if name not in keys:
+                keys[name] = _order(name)
+            return keys[name]
+
+        def newest(*names: str | None) -> str | None:
+            best = None
+            for name in names:
+                if name and (best is None or key(name) > key(best)):
+                    best = name
+            return best
+
+        for root in self.names:
+            if root in index or root not in successors:
+                continue  # Nothing supersedes an AGD without successors: latest is None
+            work = [(root, iter(successors.get(root, ())))]
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index and child not in successors:
+                        # Not superseded by anything: a finished component of its own
+                        index[child] = lowlink[child] = len(index)
+                        component_of[child] = len(reach_active)
+                        reach_active.append(child)
+                        reach_any.append(child)
+                    elif child not in index:
+                        index[child] = lowlink[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(successors.get(child, ()))))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] != index[node]:
+                    continue
+
+                members = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    members.append(member)
+                    if member == node:
+                        break
+                component = len(reach_active)
+                for member in members:
+                    component_of[member] = component
+
+                downstream = {component_of[s] for m in members for s in successors.get(m, ())} - {component}
+                active = newest(*(reach_active[c] for c in downstream))
+                any_ = newest(*(reach_any[c] for c in downstream))
+                for member in members:
+                    self._latest[member] = active or any_
+                if len(members) > 1 or node in successors.get(node, ()):
+                    self._cycles.append(sorted(members, key=_order))
+                    for member in members:
+                        others = [m for m in members if m != member]
+                        self._latest[member] = (newest(active, *(m for m in others if self.status(m) != STATUS_OBSOLETED))
+                                                or newest(any_, *others))
+                reach_active.append(newest(active, *(m for m in members if self.status(m) != STATUS_OBSOLETED)))
+                reach_any.append(newest(any_, *members))
+
+        self._cycles.sort(key=lambda members: _order(members[0]))
+
+    def errors(self) -> list[AgdError]:
+        """Cycle errors, then asymmetry errors, each ordered by AGD file."""
+        errors = []
+        for members in self.cycles():
+            chain = ' <-> '.join(get_agd_id(m) or m for m in members)
+            errors.append(AgdError(members[0], 'relation_cycle', f"relation cycle between {chain}", value=chain))
+
+        for source, rel_type, target in sorted(self.reverse - self.forward, key=lambda e: (_order(e[2]), _order(e[0]))):
+            errors.append(AgdError(target, 'reverse_mismatch',
+                                   f"{REVERSE_NAMES[rel_type]} lists {get_agd_id(source)}, "
+                                   f"but {source} does not declare {REL_NAMES[rel_type]}: {get_agd_id(target)}",
+                                   REVERSE_NAMES[rel_type], get_agd_id(source)))
+
+        for source, rel_type, target in sorted(self.forward - self.reverse, key=lambda e: (_order(e[2]), _order(e[0]))):
+            if rel_type in self.reverse_fields.get(target, ()):
+                errors.append(AgdError(target, 'reverse_missing',
+                                       f"{REVERSE_NAMES[rel_type]} does not list {get_agd_id(source)}, "
+                                       f"which declares {REL_NAMES[rel_type]}: {get_agd_id(target)}",
+                                       REVERSE_NAMES[rel_type], get_agd_id(source)))
+        return errors
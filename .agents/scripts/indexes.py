@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Index file generation for the Agent Centric framework.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Generates:
+    - INDEX-TAGS.md: Files with their tags
+    - INDEX-AGD-RELATIONS.md: AGD obsoletes/updates relationships
+    - INDEX-AGD-STATUS.md: Effective status and newest superseding AGD (see graph.py)
+    - INDEX-SUMMARY.md: Status, title, description and tags of each AGD,
+      optionally trimmed to summaryMaxBytes
+    - .cache/query.json: Lookup structures for agd-query.py (see query.py)
+    - index/tags/<tag>.md: Optional per-tag shards (see tag_shards.py)
+    - index.sqlite: Optional full-text index (see sqlite_index.py)
+    - INDEX-CODE-REFS.md: Optional AGD citations in source code (see code_refs.py)
+
+With `generate-index.py --since <rev>`, update_indexes_since() patches only
+the lines of AGDs changed since a git revision (see git_changes.py).
+
+With `generate-index.py --format jsonl`, export_jsonl() streams one JSON
+object per AGD to stdout instead (id, path, title, description, tags,
+status and relations), so tools need neither the AGD files nor the index
+line formats.
+
+Indexes are maintained incrementally: the file signatures used for the last
+write are kept in .agents/.cache/indexes.json, and only the lines of AGDs
+that changed since then (plus AGDs referencing them) are regenerated and
+spliced into the existing file. A full rebuild produces byte-identical
+output. Lines are generated in AGD order and streamed, together with the
+lines kept from the existing file, into a buffered temp file (AtomicWriter
+in utils.py), so memory use does not grow with the index size. The file is
+only replaced (os.replace) when its content changed.
+"""
+
+import heapq
+import json
+import os
+from dataclasses import dataclass
+from itertools import zip_longest
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TextIO
+
+from corpus import AgdRecord, Corpus
+from query import save_query_index
+from stats import STATS
+from utils import (
+    DECISIONS_DIR,
+    REF_FIELDS,
+    RELATION_FIELDS,
+    RELATIONS_INDEX,
+    STATUS_INDEX,
+    SUMMARY_INDEX,
+    TAGS_INDEX,
+    AtomicWriter,
+    get_agd_id,
+    get_agd_sort_key,
+    get_cache_dir,
+)
+
+if TYPE_CHECKING:
+    from git_changes import ChangeSet
+
+STATE_VERSION = 1
+STATE_FILE = 'indexes.json'
+
+TAGS_HEADER = (
+    "# Tags Index\n\n"
+    "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+    "<!-- Search with: grep \"#tagname\" INDEX-TAGS.md -->\n\n"
+)
+
+RELATIONS_HEADER = (
+    "# AGD Relations Index\n\n"
+    "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+    "<!-- -(o)-> : obsoletes, -(u)-> : updates -->\n"
+    "<!-- Search with: grep \"AGD-001\" INDEX-AGD-RELATIONS.md -->\n\n"
+)
+
+SUMMARY_HEADER = (
+    "# AGD Summary Index\n\n"
+    "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+    "<!-- path [status] title: description #tags -->\n"
+    "<!-- Search with: grep -i \"keyword\" INDEX-SUMMARY.md -->\n\n"
+)
+
+SUMMARY_PRIORITIES = ('recent', 'referenced')
+
+STATUS_HEADER = (
+    "# AGD Status Index\n\n"
+    "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+    "<!-- status: active | updated | obsoleted; -> newest AGD superseding it (transitively) -->\n"
+    "<!-- Search with: grep \"AGD-001_\" INDEX-AGD-STATUS.md -->\n\n"
+)
+
+
+def tag_lines(record: AgdRecord, corpus: Corpus) -> list[str]:
+    """INDEX-TAGS.md lines contributed by one AGD."""
+    tags_str = record.frontmatter.get('tags')
+    if not tags_str:
+        return []
+    tags = [f"#{t.strip()}" for t in tags_str.split(',') if t.strip()]
+    if not tags:
+        return []
+    return [f"{record.relative_path}: {', '.join(tags)}\n"]
+
+
+def relation_lines(record: AgdRecord, corpus: Corpus) -> list[str]:
+    """INDEX-AGD-RELATIONS.md lines contributed by one AGD."""
+    lines = []
+    for field, rel_type in RELATION_FIELDS:
+        if field in record.frontmatter and record.frontmatter[field]:
+            refs = [r.strip() for r in record.frontmatter[field].split(',') if r.strip()]
+            for ref in refs:
+                target_file = corpus.resolver.resolve(ref)
+                if target_file:
+                    lines.append(f"{record.relative_path} -({rel_type})-> {DECISIONS_DIR}/{target_file.name}\n")
+    return lines
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    filename: str
+    header: str
+    render: Callable[[AgdRecord, Corpus], list[str]]
+    separator: str  # Text following the source path on each line
+
+
+INDEXES = (
+    IndexSpec(TAGS_INDEX, TAGS_HEADER, tag_lines, ': '),
+    IndexSpec(RELATIONS_INDEX, RELATIONS_HEADER, relation_lines, ' -('),
+)
+
+
+def _line_source(line: str, spec: IndexSpec) -> str:
+    """AGD file name a line belongs to (e.g. AGD-001_name.md)."""
+    return line.split(spec.separator, 1)[0][len(DECISIONS_DIR) + 1:]
+
+
+def _source_order(name: str) -> tuple[int, str]:
+    return get_agd_sort_key(name), name
+
+
+def iter_full(corpus: Corpus, spec: IndexSpec) -> Iterator[str]:
+    """All body lines of an index, rendered from scratch in AGD order."""
+    for record in corpus.records:
+        if not record.error:
+            yield from spec.render(record, corpus)
+
+
+def iter_incremental(corpus: Corpus, spec: IndexSpec, old_lines: Iterable[str], affected: set[str]) -> Iterator[str]:
+    """Lines of affected AGDs re-rendered and spliced into old_lines.
+
+    Both inputs are ordered by (AGD number, file name), so a merge keeps the
+    same order as iter_full(). old_lines may be an open index file.
+    """
+    kept = (line for line in old_lines if _line_source(line, spec) not in affected)
+    fresh = (line for record in corpus.records if record.name in affected and not record.error
+             for line in spec.render(record, corpus))
+    return heapq.merge(kept, fresh, key=lambda line: _source_order(_line_source(line, spec)))
+
+
+def _affected_sources(corpus: Corpus, previous: dict[str, list]) -> set[str]:
+    """Names of AGDs whose index lines may differ from the last write.
+
+    That is every added, changed or removed file, plus every file whose
+    references point at the AGD ID of one of those (a target appearing,
+    disappearing or being renamed changes the referring relation lines).
+    """
+    current = {record.name: record.signature for record in corpus.records}
+    changed = {name for name, signature in current.items() if previous.get(name) != signature}
+    changed.update(name for name in previous if name not in current)
+
+    changed_ids = {get_agd_id(name) for name in changed}
+    affected = set(changed)
+    for record in corpus.records:
+        if record.name in affected:
+            continue
+        for field, _ in RELATION_FIELDS:
+            refs = record.frontmatter.get(field)
+            if refs and any(get_agd_id(r.strip()) in changed_ids for r in refs.split(',')):
+                affected.add(record.name)
+                break
+    return affected
+
+
+def _file_stat(path: Path) -> list[int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load_state(corpus: Corpus) -> dict | None:
+    """Previous index state, or None if the indexes must be fully rebuilt.
+
+    The state is only trusted if every index file is still exactly the one
+    written last time (same mtime and size).
+    """
+    try:
+        with open(get_cache_dir(corpus.project_dir) / STATE_FILE) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return None
+    files = state.get('files')
+    sources = state.get('sources')
+    if not isinstance(files, dict) or not isinstance(sources, dict):
+        return None
+    for spec in INDEXES:
+        if files.get(spec.filename) != _file_stat(corpus.agents_dir / spec.filename):
+            return None
+    return state
+
+
+def _load_affected(corpus: Corpus) -> set[str] | None:
+    """Sources to re-render since the previous state, or None for a full run.
+
+    The state (a signature per AGD) is released before rendering starts.
+    """
+    state = _load_state(corpus)
+    return _affected_sources(corpus, state['sources']) if state else None
+
+
+def _save_state(corpus: Corpus) -> None:
+    state = {
+        'version': STATE_VERSION,
+        'files': {spec.filename: _file_stat(corpus.agents_dir / spec.filename) for spec in INDEXES},
+        'sources': {record.name: record.signature for record in corpus.records},
+    }
+    try:
+        with AtomicWriter(get_cache_dir(corpus.project_dir) / STATE_FILE) as f:
+            f.write_json(state, depth=2)
+    except OSError:
+        pass
+
+
+def _open_index(path: Path, header: str) -> TextIO | None:
+    """An existing index opened just past its header, or None if unusable."""
+    try:
+        f = open(path)
+    except OSError:
+        return None
+    try:
+        if f.read(len(header)) == header:
+            return f
+    except (OSError, ValueError):
+        pass
+    f.close()
+    return None
+
+
+def _write_lines(path: Path, header: str, lines: Iterable[str]) -> int:
+    """Stream header and lines into path through a buffered temp file,
+    replacing it only if the content changed. Returns the number of lines."""
+    count = 0
+    with AtomicWriter(path, keep_unchanged=True) as writer:
+        writer.write(header)
+        for line in lines:
+            writer.write(line)
+            count += 1
+    if writer.replaced and STATS.enabled:
+        STATS.count('index_files_written')
+    return count
+
+
+def _write_index(corpus: Corpus, spec: IndexSpec, affected: set[str] | None) -> int:
+    """Write a tags or relations index, splicing into the existing file when
+    affected is given and the file is usable. Returns the number of lines.
+
+    Lines go from the generators straight to the writer; neither the old
+    nor the new file is held in memory.
+    """
+    old_file = _open_index(corpus.agents_dir / spec.filename, spec.header) if affected is not None else None
+    try:
+        lines = iter_incremental(corpus, spec, old_file, affected) if old_file else iter_full(corpus, spec)
+        return _write_lines(corpus.agents_dir / spec.filename, spec.header, lines)
+    finally:
+        if old_file:
+            old_file.close()
+
+
+def compare_indexes(corpus: Corpus) -> list[str]:
+    """Names of the tags/relations indexes whose incremental rendering (from
+    the stored state and existing file) differs from a full rebuild.
+
+    Both renderings are streamed and compared line by line; neither is
+    held in memory.
+    """
+    affected = _load_affected(corpus)
+
+    mismatched = []
+    for spec in INDEXES:
+        old_file = _open_index(corpus.agents_dir / spec.filename, spec.header) if affected is not None else None
+        try:
+            incremental = iter_incremental(corpus, spec, old_file, affected) if old_file else iter_full(corpus, spec)
+            if any(a != b for a, b in zip_longest(incremental, iter_full(corpus, spec))):
+                mismatched.append(spec.filename)
+        finally:
+            if old_file:
+                old_file.close()
+    return mismatched
+
+
+def status_lines(record: AgdRecord, corpus: Corpus) -> list[str]:
+    """INDEX-AGD-STATUS.md line of one AGD."""
+    line = f"{record.relative_path}: {corpus.graph.status(record.name)}"
+    latest = corpus.graph.latest(record.name)
+    if latest:
+        line += f" -> {DECISIONS_DIR}/{latest}"
+    return [line + '\n']
+
+
+STATUS_SPEC = IndexSpec(STATUS_INDEX, STATUS_HEADER, status_lines, ': ')
+
+
+def summary_lines(record: AgdRecord, corpus: Corpus) -> list[str]:
+    """INDEX-SUMMARY.md line of one AGD."""
+    frontmatter = record.frontmatter
+    line = f"{record.relative_path} [{corpus.graph.status(record.name)}] {frontmatter.get('title', '')}"
+    if frontmatter.get('description'):
+        line += f": {frontmatter['description']}"
+    tags = [f"#{t.strip()}" for t in frontmatter.get('tags', '').split(',') if t.strip()]
+    if tags:
+        line += f" {', '.join(tags)}"
+    return [line + '\n']
+
+
+SUMMARY_SPEC = IndexSpec(SUMMARY_INDEX, SUMMARY_HEADER, summary_lines, ' [')
+
+
+def summary_budget(config: dict) -> tuple[int, str] | None:
+    """(summaryMaxBytes, summaryPriority) from config.json, or None if unlimited."""
+    budget = config.get('summaryMaxBytes')
+    if not isinstance(budget, int) or isinstance(budget, bool) or budget <= 0:
+        return None
+    priority = config.get('summaryPriority')
+    return budget, priority if priority in SUMMARY_PRIORITIES else SUMMARY_PRIORITIES[0]
+
+
+def iter_summary(corpus: Corpus) -> Iterator[str]:
+    """INDEX-SUMMARY.md body lines.
+
+    Like the status index, rendered in full on every run. With
+    summaryMaxBytes, entries are taken newest first (summaryPriority
+    "recent") or most obsoleted/updated first ("referenced"), until the next
+    one would exceed the budget; the kept lines stay in AGD order and a
+    closing comment says how many were left out. Only line sizes are kept
+    for the ranking; lines are rendered again when written.
+    """
+    records = [record for record in corpus.records if not record.error]
+    limit = summary_budget(corpus.config)
+    if limit is None:
+        for record in records:
+            yield from summary_lines(record, corpus)
+        return
+
+    budget, priority = limit
+    note = (f"\n<!-- {{shown}} of {len(records)} AGDs shown (summaryMaxBytes: {budget}, "
+            f"summaryPriority: {priority}); see INDEX-AGD-STATUS.md for all -->\n")
+    used = len(SUMMARY_HEADER.encode()) + len(note.format(shown=len(records)).encode())
+    sizes = [len(summary_lines(record, corpus)[0].encode()) for record in records]
+    ranked = list(range(len(records) - 1, -1, -1))  # Newest first
+    if priority == 'referenced':
+        superseded_by = corpus.graph.superseded_by
+        ranked.sort(key=lambda i: len(superseded_by.get(records[i].name, ())), reverse=True)
+    kept = set()
+    for i in ranked:
+        used += sizes[i]
+        if used > budget:
+            break
+        kept.add(i)
+    for i, record in enumerate(records):
+        if i in kept:
+            yield from summary_lines(record, corpus)
+    if len(kept) < len(records):
+        yield from note.format(shown=len(kept)).splitlines(keepends=True)
+
+
+def update_indexes_since(changes: 'ChangeSet') -> tuple[int, int] | None:
+    """Patch the Markdown indexes for the AGDs changed since a git revision.
+
+    Tag and relation lines are re-rendered for changes.affected, status and
+    summary lines for every AGD connected to a change (see git_changes.py);
+    all other lines are kept. A trimmed summary (summaryMaxBytes) needs a
+    full run. Per-tag shards are rebuilt from the patched INDEX-TAGS.md, and
+    INDEX-CODE-REFS.md from the source scan. The SQLite index and query
+    cache are left to the next full run. Returns
+    (tags_count, relations_count), or None if an index file is missing or
+    not a generated index, and a full run is needed.
+    """
+    corpus = changes.corpus
+    plan = [(spec, changes.affected) for spec in INDEXES]
+    plan.append((STATUS_SPEC, changes.related | changes.removed))
+    plan.append((SUMMARY_SPEC, changes.related | changes.removed))
+    if summary_budget(corpus.config):
+        return None  # Trimming ranks every AGD
+    if _summary_trimmed(corpus.agents_dir / SUMMARY_INDEX):
+        return None
+
+    # Open every file before writing any, so that a full run is still
+    # possible if one is unusable
+    old_files = []
+    try:
+        for spec, _ in plan:
+            old_file = _open_index(corpus.agents_dir / spec.filename, spec.header)
+            if old_file is None:
+                return None
+            old_files.append(old_file)
+
+        with STATS.phase('render'):
+            counts = [_write_lines(corpus.agents_dir / spec.filename, spec.header,
+                                   iter_incremental(corpus, spec, old_file, affected))
+                      for (spec, affected), old_file in zip(plan, old_files)]
+    finally:
+        for old_file in old_files:
+            old_file.close()
+
+    with STATS.phase('write'):
+        if corpus.config.get('shardedTagIndex'):
+            from tag_shards import tag_members_from_index, write_tag_shards
+            with _open_index(corpus.agents_dir / TAGS_INDEX, TAGS_HEADER) as tags_file:
+                members = tag_members_from_index(tags_file)
+            write_tag_shards(corpus, members)
+
+        if corpus.config.get('codeReferences'):
+            from code_refs import write_code_refs_index
+            write_code_refs_index(corpus)  # Needs only the directory listing
+
+    return counts[0], counts[1]
+
+
+def _summary_trimmed(path: Path) -> bool:
+    """Whether INDEX-SUMMARY.md ends with the summaryMaxBytes note (its
+    lines cannot be patched individually)."""
+    summary_file = _open_index(path, SUMMARY_HEADER)
+    if summary_file is None:
+        return False  # Reported as unusable when opened for patching
+    with summary_file:
+        return any(line.startswith(('<', '\n')) for line in summary_file)
+
+
+def agd_json(record: AgdRecord, corpus: Corpus) -> dict:
+    """The --format jsonl object of one AGD; relations holds non-empty reference fields only."""
+    data = {'id': record.agd_id, 'path': record.relative_path}
+    if record.error:
+        data['error'] = record.error
+        return data
+    frontmatter = record.frontmatter
+    data['title'] = frontmatter.get('title', '')
+    data['description'] = frontmatter.get('description', '')
+    data['tags'] = list(dict.fromkeys(t.strip() for t in frontmatter.get('tags', '').split(',') if t.strip()))
+    data['status'] = corpus.graph.status(record.name)
+    data['relations'] = {field: refs for field in REF_FIELDS
+                         if (refs := [r.strip() for r in frontmatter.get(field, '').split(',') if r.strip()])}
+    return data
+
+
+def export_jsonl(corpus: Corpus, out: TextIO) -> int:
+    """Write one JSON line per AGD to out, in AGD order. Returns the number written."""
+    with STATS.phase('render'):
+        for record in corpus.records:
+            out.write(json.dumps(agd_json(record, corpus), ensure_ascii=False, separators=(',', ':')))
+            out.write('\n')
+    return len(corpus.records)
+
+
+def generate_indexes(corpus: Corpus, full: bool = False) -> tuple[int, int]:
+    """Generate all index files. Returns (tags_count, relations_count).
+
+    The Markdown indexes are streamed to their files (see _write_lines());
+    unchanged files are left untouched (mtime included).
+    """
+    if not corpus.exists:
+        return 0, 0
+
+    affected = None if full else _load_affected(corpus)
+
+    with STATS.phase('render'):
+        counts = [_write_index(corpus, spec, affected) for spec in INDEXES]
+        # Status is not maintained incrementally: a change can alter the status
+        # or newest successor of AGDs anywhere along its chains, and the graph
+        # is built per run anyway (update_indexes_since() splices whole
+        # connected components)
+        _write_lines(corpus.agents_dir / STATUS_INDEX, STATUS_HEADER, iter_full(corpus, STATUS_SPEC))
+        _write_lines(corpus.agents_dir / SUMMARY_INDEX, SUMMARY_HEADER, iter_summary(corpus))
+    with STATS.phase('write'):
+        _save_state(corpus)
+        save_query_index(corpus)
+
+        if corpus.config.get('shardedTagIndex'):
+            from tag_shards import write_tag_shards
+            write_tag_shards(corpus)
+
+        if corpus.config.get('sqliteIndex'):
+            from sqlite_index import update_sqlite_index
+            update_sqlite_index(corpus)
+
+        if corpus.config.get('codeReferences'):
+            from code_refs import write_code_refs_index
+            write_code_refs_index(corpus)
+
+    return counts[0], counts[1]
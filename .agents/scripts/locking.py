@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Coalescing lock for hook rebuilds.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+A burst of hook calls from parallel agents should not start one full
+validate + reindex each. Every caller sets a dirty flag
+(.agents/.cache/hook.dirty) and then takes an exclusive lock
+(.agents/.cache/hook.lock), waiting while another caller holds it. Holding
+the lock, it clears the flag and rebuilds, repeating while the flag is set
+again during the rebuild.
+
+A caller whose flag was already cleared by the previous holder still calls
+work() once: its changes were included in that rebuild, and work() is
+expected to return the recorded result cheaply (see rebuild() in
+agent-centric.py). Each caller thus reports the outcome of a rebuild that
+started after its own change, the final rebuild always starts after the
+last change, and index writes of concurrent hooks never interleave.
+
+Other writers of the same files (the daemon, generate-index.py and
+check_edited_file() in code_refs.py) take the lock through run_locked(),
+which does not request a rebuild.
+"""
+
+import os
+from pathlib import Path
+
+from utils import get_cache_dir
+
+LOCK_FILE = 'hook.lock'
+DIRTY_FILE = 'hook.dirty'
+
+
+class CoalescingLock:
+    """Exclusive flock plus a dirty flag file."""
+
+    def __init__(self, project_dir: Path):
+        cache_dir = get_cache_dir(project_dir)
+        self.lock_path = cache_dir / LOCK_FILE
+        self.dirty_path = cache_dir / DIRTY_FILE
+        self.fd: int | None = None
+
+    def mark_dirty(self) -> None:
+        self.dirty_path.parent.mkdir(parents=True, exist_ok=True)
+        self.dirty_path.touch()
+
+    def take_dirty(self) -> bool:
+        """Clear the dirty flag. Returns whether it was set."""
+        try:
+            self.dirty_path.unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def acquire(self) -> None:
+        """Take the lock, waiting while another process holds it."""
+        import fcntl
+
+        fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except OSError:
+            os.close(fd)
+            raise
+        self.fd = fd
+
+    def release(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)  # Closing drops the flock
+            self.fd = None
+
+
+def run_coalesced(project_dir: Path, work):
+    """Run work() for this caller, coalescing with concurrent callers.
+
+    Returns the result of the last work() call made by this process, which
+    started after this caller's changes. Blocks while another process runs
+    work(). Without fcntl (non-POSIX), work() simply runs once.
+    """
+    try:
+        import fcntl  # noqa: F401
+    except ImportError:
+        return work()
+
+    lock = CoalescingLock(project_dir)
+    lock.mark_dirty()
+    lock.acquire()
+    try:
+        ran = False
+        while lock.take_dirty():
+            result = work()
+            ran = True
+        if not ran:
+            # The previous holder's last rebuild included our changes
+            result = work()
+    finally:
+        lock.release()
+    return result
+
+
+def run_locked(project_dir: Path, work):
+    """Run work() holding the hook lock, without requesting a rebuild.
+
+    For other writers of the files a rebuild writes: the daemon,
+    generate-index.py and check_edited_file() in code_refs.py. Returns
+    work()'s result.
+    """
+    try:
+        import fcntl  # noqa: F401
+    except ImportError:
+        return work()
+
+    cache_dir = get_cache_dir(project_dir)
+    if not cache_dir.parent.is_dir():
+        return work()  # No .agents/ directory, so no files to share
+    cache_dir.mkdir(exist_ok=True)
+    lock = CoalescingLock(project_dir)
+    lock.acquire()
+    try:
+        return work()
+    finally:
+        lock.release()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Cached reference map for scoped validation.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Stored in .agents/.cache/refs.json after each validation:
+    - files:      AGD file name -> [mtime_ns, size]
+    - refs:       AGD file name -> its non-empty reference fields
+                  (obsoletes, updates, obsoleted_by, updated_by)
+    - referrers:  AGD ID -> names of the files referencing it
+    - config:     signature of config.json
+    - clean:      whether that validation found no errors
+
+With this, a hook call that edited a single AGD only needs to read that
+file: the other AGDs' relations come from the map (see validate_scoped()
+in validation.py).
+"""
+
+import json
+from pathlib import Path
+
+from cache import file_signature
+from corpus import AgdRecord, Corpus
+from utils import REF_FIELDS, atomic_write_text, get_agd_id, get_agd_sort_key, get_cache_dir
+
+REFMAP_VERSION = 1
+REFMAP_FILE = 'refs.json'
+
+
+def config_signature(config_path: Path) -> list[int] | None:
+    try:
+        return file_signature(config_path)
+    except OSError:
+        return None
+
+
+def _ref_fields(frontmatter: dict[str, str]) -> dict[str, str]:
+    return {field: frontmatter[field] for field in REF_FIELDS if frontmatter.get(field, '').strip()}
+
+
+def _ref_ids(fields: dict[str, str]) -> set[str]:
+    return {agd_id for value in fields.values() for ref in value.split(',') if (agd_id := get_agd_id(ref.strip()))}
+
+
+class ReferenceMap:
+    """Reference fields of every AGD plus the reverse (referrers) index."""
+
+    def __init__(self, project_dir: Path, config: list[int] | None, clean: bool,
+                 files: dict[str, list[int] | None], refs: dict[str, dict[str, str]],
+                 referrers: dict[str, list[str]]):
+        self.path = get_cache_dir(project_dir) / REFMAP_FILE
+        self.config = config
+        self.clean = clean
+        self.files = files
+        self.refs = refs
+        self.referrers = referrers
+
+    @classmethod
+    def build(cls, corpus: Corpus, clean: bool) -> 'ReferenceMap':
+        files = {}
+        refs = {}
+        referrers: dict[str, list[str]] = {}
+        for record in corpus.records:
+            files[record.name] = record.signature[:2] if record.signature else None
+            fields = _ref_fields(record.frontmatter)
+            if not fields:
+                continue
+            refs[record.name] = fields
+            for agd_id in sorted(_ref_ids(fields)):
+                referrers.setdefault(agd_id, []).append(record.name)
+        return cls(corpus.project_dir, config_signature(corpus.agents_dir / 'config.json'), clean,
+                   files, refs, referrers)
+
+    @classmethod
+    def load(cls, project_dir: Path) -> 'ReferenceMap | None':
+        """Load the map, or None if it is missing, corrupt or outdated."""
+        try:
+            with open(get_cache_dir(project_dir) / REFMAP_FILE) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != REFMAP_VERSION:
+            return None
+        try:
+            return cls(project_dir, data['config'], bool(data['clean']), dict(data['files']),
+                       dict(data['refs']), dict(data['referrers']))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def save(self) -> None:
+        try:
+            atomic_write_text(self.path, json.dumps({
+                'version': REFMAP_VERSION,
+                'config': self.config,
+                'clean': self.clean,
+                'files': self.files,
+                'refs': self.refs,
+                'referrers': self.referrers,
+            }, separators=(',', ':')))
+        except OSError:
+            pass  # Only an optimization; the next run validates everything
+
+    def update(self, record: AgdRecord, stat: list[int] | None) -> None:
+        """Replace the entry of one (changed or new) AGD file."""
+        name = record.name
+        for agd_id in _ref_ids(self.refs.pop(name, {})):
+            names = [n for n in self.referrers.get(agd_id, ()) if n != name]
+            if names:
+                self.referrers[agd_id] = names
+            else:
+                self.referrers.pop(agd_id, None)
+
+        self.files[name] = stat
+        fields = _ref_fields(record.frontmatter)
+        if fields:
+            self.refs[name] = fields
+            for agd_id in _ref_ids(fields):
+                self.referrers.setdefault(agd_id, []).append(name)
+
+    def unchanged_except(self, entries: dict[str, list[int] | None], name: str) -> bool:
+        """Whether the decisions directory listing (see stat_decisions() in
+        fingerprint.py) matches the map apart from name.
+
+        name itself may be new; any other file added, removed, renamed or
+        modified since the map was written makes this False.
+        """
+        if len(entries) - (name in entries) != len(self.files) - (name in self.files):
+            return False
+        files = self.files
+        return all(files.get(other, False) == stat for other, stat in entries.items() if other != name)
+
+    def component(self, name: str, ids: dict[str, str]) -> list[str]:
+        """name plus every AGD connected to it by references, in AGD order.
+
+        ids maps each AGD ID to the file claiming it (see claimed_ids()).
+        """
+        seen = {name}
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            neighbors = [ids[agd_id] for agd_id in _ref_ids(self.refs.get(current, {})) if agd_id in ids]
+            neighbors += self.referrers.get(get_agd_id(current) or '', ())
+            for neighbor in neighbors:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    pending.append(neighbor)
+        return sorted(seen, key=lambda n: (get_agd_sort_key(n), n))
+
+
+def claimed_ids(names) -> dict[str, list[str]]:
+    """AGD ID -> names of the files claiming it, counted like AgdResolver
+    but without building a Path per file."""
+    claims: dict[str, list[str]] = {}
+    for name in names:
+        agd_id = get_agd_id(name)
+        if agd_id and name[len(agd_id):len(agd_id) + 1] == '_':
+            claims.setdefault(agd_id, []).append(name)
+    return claims
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Optional per-tag index shards.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Enabled with `"shardedTagIndex": true` in config.json. Writes under .agents/:
+    - index/tags.md:          manifest, one `tag: count` line per tag
+    - index/tags/<tag>.md:    AGDs with that tag, one path per line
+                              (path-like tags such as `skills/agent-centric`
+                              become nested files)
+
+A shard is only rewritten when its member list changes, and shards of tags
+no longer in use are removed.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable
+
+from corpus import Corpus
+from utils import TAG_SHARDS_DIR, TAG_SHARDS_MANIFEST, atomic_write_text
+
+MANIFEST_HEADER = (
+    "# Tag Shards\n\n"
+    "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+    "<!-- tag: number of AGDs; members are listed in index/tags/<tag>.md -->\n\n"
+)
+
+
+def shard_header(tag: str) -> str:
+    return (
+        f"# Tag: {tag}\n\n"
+        "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+        "<!-- Paths are relative to .agents/ -->\n\n"
+    )
+
+
+def is_safe_tag(tag: str) -> bool:
+    """Whether tag maps to a file inside the shards directory."""
+    return all(part not in ('', '.', '..') for part in tag.split('/')) and '\\' not in tag and '\0' not in tag
+
+
+def tag_members(corpus: Corpus) -> dict[str, list[str]]:
+    """tag -> relative paths of the AGDs carrying it, in AGD order."""
+    members: dict[str, list[str]] = {}
+    for record in corpus.records:
+        if record.error:
+            continue
+        tags_str = record.frontmatter.get('tags', '')
+        for tag in dict.fromkeys(t.strip() for t in tags_str.split(',') if t.strip()):
+            members.setdefault(tag, []).append(record.relative_path)
+    return members
+
+
+def tag_members_from_index(lines: Iterable[str]) -> dict[str, list[str]]:
+    """Same as tag_members(), read back from the body lines of INDEX-TAGS.md
+    (e.g. the file opened past its header)."""
+    members: dict[str, list[str]] = {}
+    for line in lines:
+        path, _, tags = line.rstrip('\n').partition(': ')
+        for tag in dict.fromkeys(t.strip()[1:] for t in tags.split(',') if t.strip()):
+            if tag:
+                members.setdefault(tag, []).append(path)
+    return members
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    try:
+        if path.read_text() == content:
+            return False
+    except OSError:
+        pass
+    atomic_write_text(path, content)
+    return True
+
+
+def _remove_stale(shards_dir: Path, keep: set[Path]) -> None:
+    """Delete shard files not in keep, then directories left empty."""
+    for root, dirs, files in os.walk(shards_dir, topdown=False):
+        root_path = Path(root)
+        for name in files:
+            path = root_path / name
+            if name.endswith('.md') and path not in keep:
+                path.unlink()
+        if root_path != shards_dir and not os.listdir(root_path):
+            root_path.rmdir()
+
+
+def write_tag_shards(corpus: Corpus, members: dict[str, list[str]] | None = None) -> int:
+    """Bring the shards and manifest in line with the corpus, or with members
+    (tag -> paths) when given. Returns shards written."""
+    shards_dir = corpus.agents_dir / TAG_SHARDS_DIR
+    if members is None:
+        members = tag_members(corpus)
+    members = {tag: paths for tag, paths in sorted(members.items()) if is_safe_tag(tag)}
+
+    written = 0
+    keep = set()
+    for tag, paths in members.items():
+        path = shards_dir / f"{tag}.md"
+        keep.add(path)
+        written += _write_if_changed(path, shard_header(tag) + ''.join(f"{p}\n" for p in paths))
+
+    manifest = MANIFEST_HEADER + ''.join(f"{tag}: {len(paths)}\n" for tag, paths in members.items())
+    _write_if_changed(corpus.agents_dir / TAG_SHARDS_MANIFEST, manifest)
+    if shards_dir.is_dir():
+        _remove_stale(shards_dir, keep)
+    return written
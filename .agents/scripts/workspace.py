@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Workspace (monorepo) mode: every .agents tree under a directory in one run.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Usage:
+    validate-agds.py --workspace [root] [--jobs N]
+    generate-index.py --workspace [root] [--jobs N]
+
+find_projects() walks root once and returns each directory holding
+.agents/config.json (hidden directories and node_modules are skipped).
+Projects are processed on a thread pool of --jobs workers (default: CPU
+count, at most 8) and reported in path order, each line prefixed with the
+project's path relative to root.
+
+An AGD can reference another project's AGD as `pkg:AGD-012`, where pkg is
+that project's `projectName` from config.json, or its directory name.
+Validation resolves these against the AGD IDs of all projects, collected
+from their already loaded corpora (project_ids()).
+"""
+
+import os
+import sys
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from corpus import AgdError, Corpus
+from utils import AGENTS_DIR, MAX_LOADER_THREADS, SKIPPED_DIRS, load_config, parallel_map, pop_option
+
+T = TypeVar('T')
+
+
+@dataclass
+class Project:
+    """One .agents tree found under the workspace root."""
+
+    path: Path
+    label: str   # Path relative to the workspace root, prefixed to its output
+    name: str    # Used in cross-project references (`name:AGD-012`)
+
+
+def project_name(path: Path, config: dict) -> str:
+    name = config.get('projectName')
+    return name if isinstance(name, str) and name else path.resolve().name
+
+
+def find_projects(root: Path) -> list[Project]:
+    """Directories under root (root included) that contain .agents/config.json."""
+    projects = []
+    for dirpath, dirnames, _ in os.walk(root):
+        if AGENTS_DIR in dirnames:
+            config_path = Path(dirpath, AGENTS_DIR, 'config.json')
+            if config_path.is_file():
+                path = Path(dirpath)
+                label = path.relative_to(root).as_posix()
+                projects.append(Project(path, label, project_name(path, load_config(config_path) or {})))
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d not in SKIPPED_DIRS)
+    return sorted(projects, key=lambda p: p.label)
+
+
+def project_ids(projects: list[Project], corpora: list[Corpus]) -> dict[str, set[str] | None]:
+    """Project name -> AGD IDs, or None for names shared by several projects."""
+    ids: dict[str, set[str] | None] = {}
+    for project, corpus in zip(projects, corpora):
+        ids[project.name] = None if project.name in ids else set(corpus.resolver.by_id)
+    return ids
+
+
+def pop_jobs(args: list[str]) -> int:
+    """Remove --jobs N from args; the default is the CPU count, at most 8."""
+    jobs = pop_option(args, '--jobs')
+    if jobs is None:
+        return min(os.cpu_count() or 1, MAX_LOADER_THREADS)
+    try:
+        return max(int(jobs), 1)
+    except ValueError:
+        print(f"Error: --jobs expects a number, got '{jobs}'", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_projects(func: Callable[..., T], items: list, jobs: int) -> list[T]:
+    """[func(item) for item in items] (one item per project) on at most jobs
+    threads, results in order."""
+    return parallel_map(func, items, min(jobs, len(items)))
+
+
+def prefix_errors(project: Project, errors: list[AgdError]) -> list[AgdError]:
+    return [replace(error, project=project.label) for error in errors]
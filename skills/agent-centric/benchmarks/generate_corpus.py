@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic .agents/ tree for benchmarking the agent-centric scripts.
+
+Usage:
+    generate_corpus.py <project_dir> [--count N] [--relations 0.3] [--broken 0.01] [--seed S]
+
+Creates <project_dir>/.agents/{config.json,decisions/,scripts/} with N AGD
+files and installs the skill scripts into .agents/scripts/.
+
+The corpus is deterministic for a given seed and varies the things that
+drive script cost: tag counts (0-8 per AGD), relation density (several
+updates/obsoletes references on some AGDs, with matching obsoleted_by),
+body sizes (a few hundred bytes to tens of KB) and, optionally, a share of
+AGDs with a reference to a non-existent AGD.
+"""
+
+import argparse
+import json
+import random
+import shutil
+from pathlib import Path
+
+SKILL_SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+TAGS = [f"{area}/{i:02d}" for area in ('arch', 'api', 'data', 'ops', 'ui') for i in range(12)]
+PARAGRAPH = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4 + "\n\n"
+
+
+def install_scripts(project_dir: Path) -> None:
+    """Copy the skill's Python scripts into .agents/scripts/ (like sync-scripts.sh)."""
+    scripts_dir = project_dir / '.agents' / 'scripts'
+    scripts_dir.mkdir(parents=True, exist_ok=True)
+    for script in SKILL_SCRIPTS_DIR.glob('*.py'):
+        shutil.copy2(script, scripts_dir / script.name)
+
+
+def generate_corpus(project_dir: Path, count: int, seed: int = 0,
+                    relation_density: float = 0.2, broken_ratio: float = 0.0) -> None:
+    """Write count AGD files plus config.json under project_dir/.agents.
+
+    relation_density is the share of AGDs that update or obsolete earlier
+    ones; broken_ratio the share that also reference an AGD beyond count.
+    """
+    rng = random.Random(seed)
+    agents_dir = project_dir / '.agents'
+    decisions_dir = agents_dir / 'decisions'
+    decisions_dir.mkdir(parents=True, exist_ok=True)
+
+    (agents_dir / 'config.json').write_text(json.dumps({"tags": TAGS, "disableAutoUpdateScripts": []}, indent=2))
+
+    obsoleted_by: dict[int, list[int]] = {}
+    decisions = []
+    for n in range(1, count + 1):
+        fields = {
+            'title': f'"Decision {n}"',
+            'description': f'"Synthetic decision number {n}"',
+        }
+        tag_count = min(len(TAGS), int(rng.expovariate(0.5)))
+        if tag_count:
+            fields['tags'] = ', '.join(rng.sample(TAGS, tag_count))
+        if n > 1 and rng.random() < relation_density:
+            targets = sorted({rng.randint(max(1, n - 500), n - 1) for _ in range(rng.choice((1, 1, 1, 2, 3)))})
+            field = 'obsoletes' if rng.random() < 0.3 else 'updates'
+            fields[field] = ', '.join(f"AGD-{t:03d}" for t in targets)
+            if field == 'obsoletes':
+                for t in targets:
+                    obsoleted_by.setdefault(t, []).append(n)
+        if rng.random() < broken_ratio:
+            fields['updates'] = ', '.join(filter(None, [fields.get('updates'), f"AGD-{count + n:03d}"]))
+        paragraphs = max(1, int(rng.lognormvariate(1.0, 1.0)))
+        decisions.append((n, fields, paragraphs))
+
+    for n, fields, paragraphs in decisions:
+        if n in obsoleted_by:
+            fields['obsoleted_by'] = ', '.join(f"AGD-{s:03d}" for s in obsoleted_by[n])
+        lines = ["---", *(f"{key}: {value}" for key, value in fields.items()), "---", "", "## Context", "",
+                 PARAGRAPH * paragraphs]
+        (decisions_dir / f"AGD-{n:03d}_decision-{n}.md").write_text('\n'.join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic AGD corpus")
+    parser.add_argument('project_dir', type=Path)
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--relations', type=float, default=0.2, help="Share of AGDs with relations")
+    parser.add_argument('--broken', type=float, default=0.0, help="Share of AGDs with a broken reference")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate_corpus(args.project_dir, args.count, args.seed, args.relations, args.broken)
+    install_scripts(args.project_dir)
+    print(f"Generated {args.count} AGDs in {args.project_dir}")
+
+
+if __name__ == '__main__':
+    main()
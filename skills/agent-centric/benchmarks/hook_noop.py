@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Measure PostToolUse hook latency for a Bash call that did not touch decisions.
+
+Usage:
+    hook_noop.py [--count 5000] [--runs 20]
+
+Generates a temporary project with --count AGDs, then times
+`agent-centric.py hook` with a Bash hook payload:
+
+    python: bare interpreter start (`python3 -c pass`), for reference
+    full:   fingerprint removed before each run (parse cache still warm)
+    no-op:  unchanged corpus, answered by the fingerprint fast path
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from generate_corpus import generate_corpus, install_scripts
+
+HOOK_INPUT = json.dumps({
+    "hook_event_name": "PostToolUse",
+    "tool_name": "Bash",
+    "tool_input": {"command": "ls"},
+})
+
+
+def run_hook(project_dir: Path) -> float:
+    """Run the hook once and return its wall time in milliseconds."""
+    script = project_dir / '.agents' / 'scripts' / 'agent-centric.py'
+    env = dict(os.environ, CLAUDE_PROJECT_DIR=str(project_dir))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, str(script), 'hook'], input=HOOK_INPUT, text=True,
+                            env=env, capture_output=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        sys.exit(f"hook failed ({result.returncode}): {result.stderr}")
+    return elapsed
+
+
+def run_python() -> float:
+    """Time a bare interpreter start in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:>7}: median {statistics.median(samples):7.1f} ms   p95 {p95:7.1f} ms   (n={len(samples)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark no-op hook latency")
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp)
+        generate_corpus(project_dir, args.count)
+        install_scripts(project_dir)
+        fingerprint_file = project_dir / '.agents' / '.cache' / 'fingerprint.json'
+
+        run_hook(project_dir)  # populate parse cache and indexes
+
+        full = []
+        for _ in range(args.runs):
+            fingerprint_file.unlink(missing_ok=True)
+            full.append(run_hook(project_dir))
+
+        noop = [run_hook(project_dir) for _ in range(args.runs)]
+        python = [run_python() for _ in range(args.runs)]
+
+    print(f"Hook latency, no-op Bash call, {args.count} AGDs")
+    summarize('python', python)
+    summarize('full', full)
+    summarize('no-op', noop)
+
+
+if __name__ == '__main__':
+    main()
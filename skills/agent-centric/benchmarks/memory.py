@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Measure the memory index generation needs on top of the loaded corpus.
+
+Usage:
+    memory.py [--sizes 1000,10000,50000] [--scripts DIR]
+
+For each size a corpus is generated (see generate_corpus.py) and a child
+process loads it, then runs generate_indexes() under tracemalloc:
+
+    full:         --full, every index file written from scratch
+    incremental:  after editing 1% of the AGDs, from the stored index state
+
+The reported peak is the Python heap allocated above the loaded corpus (the
+corpus itself must stay in memory for validation and the relation graph).
+
+--scripts benchmarks another copy of the scripts (e.g. a checkout of an
+older version) instead of this skill's.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from generate_corpus import SKILL_SCRIPTS_DIR, generate_corpus
+
+EDITED_RATIO = 0.01
+
+CHILD = r'''
+import json, sys, time, tracemalloc
+from pathlib import Path
+sys.path.insert(0, sys.argv[1])
+from corpus import load_corpus
+from indexes import generate_indexes
+
+def measure(project_dir, full):
+    corpus = load_corpus(project_dir)
+    corpus.graph.cycles()  # Built by validation before indexing
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    generate_indexes(corpus, full=full)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {'peak': peak, 'time': elapsed}
+
+project_dir = Path(sys.argv[2])
+result = {'full': measure(project_dir, True)}
+files = sorted((project_dir / '.agents' / 'decisions').glob('AGD-*.md'))
+for path in files[::max(int(1 / float(sys.argv[3])), 1)]:
+    path.write_text(path.read_text().replace('title: ', 'title: Edited ', 1))
+result['incremental'] = measure(project_dir, False)
+print(json.dumps(result))
+'''
+
+
+def measure(scripts_dir: Path, count: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp)
+        generate_corpus(project_dir, count)
+        result = subprocess.run([sys.executable, '-c', CHILD, str(scripts_dir), str(project_dir), str(EDITED_RATIO)],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            sys.exit(f"measurement failed ({result.returncode}): {result.stderr}")
+        return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index generation memory")
+    parser.add_argument('--sizes', default='1000,10000,50000', help="Comma-separated AGD counts")
+    parser.add_argument('--scripts', type=Path, default=SKILL_SCRIPTS_DIR, help="Scripts directory to benchmark")
+    args = parser.parse_args()
+
+    print(f"Index generation above the loaded corpus, {args.scripts}")
+    for count in (int(size) for size in args.sizes.split(',')):
+        result = measure(args.scripts.resolve(), count)
+        print(f"  {count:>7} AGDs  " + "  ".join(
+            f"{name}: {m['peak'] / 2**20:6.1f} MiB peak, {m['time']:5.2f}s" for name, m in result.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark validation, index generation and the hook path on synthetic corpora.
+
+Usage:
+    run.py run [--sizes 100,1000,10000] [--runs 5] [--output results.json]
+    run.py compare <baseline.json> <current.json> [--threshold 0.10]
+
+`run` generates a corpus per size (see generate_corpus.py, with 1% broken
+references) and times each scenario as a separate process:
+
+    validate: validate-agds.py <project_dir>
+    index:    generate-index.py <project_dir>
+    hook:     agent-centric.py hook, with an Edit hook payload on stdin
+
+Each scenario is measured cold (.agents/.cache and index files removed
+before every run) and warm (caches left from the previous run). Recorded
+per scenario: wall time (median, p95), peak RSS of the child process and the
+number of files it opened for reading under .agents/ (scripts excluded).
+
+`compare` prints the relative change of every shared measurement and exits
+with 1 if a median wall time or peak RSS grew by more than the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from generate_corpus import generate_corpus, install_scripts
+
+DEFAULT_SIZES = (100, 1000, 10000)
+BROKEN_RATIO = 0.01
+OPENS_ENV = 'AGENT_CENTRIC_BENCH_OPENS'
+
+SCENARIOS = {
+    'validate': ['validate-agds.py', '{project_dir}'],
+    'index': ['generate-index.py', '{project_dir}'],
+    'hook': ['agent-centric.py', 'hook'],
+}
+
+# Runs the script under test after installing an audit hook that counts
+# files opened for reading below .agents/ (excluding the scripts themselves)
+BOOTSTRAP = r'''
+import atexit, os, runpy, sys
+agents = os.path.join(os.environ['CLAUDE_PROJECT_DIR'], '.agents') + os.sep
+scripts = agents + 'scripts' + os.sep
+opened = set()
+def audit(event, args):
+    if event == 'open' and isinstance(args[0], str) and args[0].startswith(agents) \
+            and not args[0].startswith(scripts) and not (args[2] or 0) & (os.O_WRONLY | os.O_RDWR) \
+            and (args[1] is None or 'r' in args[1]):
+        opened.add(args[0])
+def report():
+    with open(os.environ['AGENT_CENTRIC_BENCH_OPENS'], 'w') as f:
+        f.write(str(len(opened)))
+atexit.register(report)
+sys.addaudithook(audit)
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+sys.path[0] = os.path.dirname(script)
+runpy.run_path(script, run_name='__main__')
+'''
+
+
+def hook_input(project_dir: Path) -> str:
+    target = project_dir / '.agents' / 'decisions' / 'AGD-001_decision-1.md'
+    return json.dumps({
+        "hook_event_name": "PostToolUse",
+        "tool_name": "Edit",
+        "tool_input": {"file_path": str(target)},
+    })
+
+
+def reset_caches(project_dir: Path) -> None:
+    """Remove all derived state so the next run starts cold."""
+    agents_dir = project_dir / '.agents'
+    shutil.rmtree(agents_dir / '.cache', ignore_errors=True)
+    for path in agents_dir.glob('INDEX-*.md'):
+        path.unlink()
+    (agents_dir / 'index.sqlite').unlink(missing_ok=True)
+
+
+def run_once(project_dir: Path, scenario: str) -> dict:
+    """Run one scenario in a child process and measure it."""
+    script, *args = SCENARIOS[scenario]
+    script_path = project_dir / '.agents' / 'scripts' / script
+    args = [a.format(project_dir=project_dir) for a in args]
+
+    with tempfile.NamedTemporaryFile('r', suffix='.opens') as opens:
+        env = dict(os.environ, CLAUDE_PROJECT_DIR=str(project_dir), **{OPENS_ENV: opens.name})
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, '-c', BOOTSTRAP, str(script_path), *args], env=env,
+                                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        proc.stdin.write(hook_input(project_dir).encode())
+        proc.stdin.close()
+        _, status, rusage = os.wait4(proc.pid, 0)
+        elapsed = (time.perf_counter() - start) * 1000
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        files_read = int(opens.read() or 0)
+
+    if proc.returncode not in (0, 2):
+        sys.exit(f"{scenario} failed with exit code {proc.returncode}")
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+    return {'wall_ms': elapsed, 'max_rss_kb': max_rss_kb, 'files_read': files_read, 'exit': proc.returncode}
+
+
+def measure(project_dir: Path, scenario: str, cold: bool, runs: int) -> dict:
+    if not cold:
+        run_once(project_dir, scenario)  # populate caches
+    samples = []
+    for _ in range(runs):
+        if cold:
+            reset_caches(project_dir)
+        samples.append(run_once(project_dir, scenario))
+
+    wall = sorted(s['wall_ms'] for s in samples)
+    return {
+        'wall_ms': {
+            'median': round(statistics.median(wall), 2),
+            'p95': round(wall[min(len(wall) - 1, int(len(wall) * 0.95))], 2),
+            'min': round(wall[0], 2),
+        },
+        'max_rss_kb': max(s['max_rss_kb'] for s in samples),
+        'files_read': samples[-1]['files_read'],
+        'exit': samples[-1]['exit'],
+    }
+
+
+def run_benchmarks(sizes: list[int], runs: int, seed: int) -> dict:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            project_dir = Path(tmp)
+            generate_corpus(project_dir, size, seed, broken_ratio=BROKEN_RATIO)
+            install_scripts(project_dir)
+            for scenario in SCENARIOS:
+                for state in ('cold', 'warm'):
+                    result = measure(project_dir, scenario, state == 'cold', runs)
+                    results.append({'size': size, 'scenario': scenario, 'state': state, **result})
+                    print(f"{size:>7} {scenario:>8} {state:>4}: median {result['wall_ms']['median']:9.1f} ms"
+                          f"   rss {result['max_rss_kb'] / 1024:7.1f} MiB   files {result['files_read']:>7}",
+                          file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'runs': runs,
+            'seed': seed,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print changes between two result files. Returns 1 on regression."""
+    def key(result: dict) -> tuple:
+        return result['size'], result['scenario'], result['state']
+
+    previous = {key(r): r for r in baseline['results']}
+    regressed = False
+    print(f"{'size':>7} {'scenario':>8} {'state':>5} {'wall median':>22} {'peak rss':>22}")
+    for result in current['results']:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        cells = []
+        for metric, value, old_value in (
+            ('wall', result['wall_ms']['median'], old['wall_ms']['median']),
+            ('rss', result['max_rss_kb'], old['max_rss_kb']),
+        ):
+            change = (value - old_value) / old_value if old_value else 0.0
+            flag = '!' if change > threshold else ' '
+            regressed |= change > threshold
+            cells.append(f"{old_value:>9} -> {value:>9} {change:+6.1%}{flag}")
+        print(f"{result['size']:>7} {result['scenario']:>8} {result['state']:>5} {cells[0]} {cells[1]}")
+
+    if regressed:
+        print(f"\n✗ Regressions above {threshold:.0%} (marked with !)", file=sys.stderr)
+        return 1
+    print(f"\n✓ No regressions above {threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent-centric scripts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run benchmarks and write JSON results")
+    run_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help="Comma-separated corpus sizes (e.g. 100,1000,10000,100000)")
+    run_parser.add_argument('--runs', type=int, default=5)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--output', '-o', type=Path, help="Write results here instead of stdout")
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="Allowed relative increase before failing (default: 0.10)")
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        sys.exit(compare(json.loads(args.baseline.read_text()), json.loads(args.current.read_text()),
+                         args.threshold))
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    results = json.dumps(run_benchmarks(sizes, args.runs, args.seed), indent=2)
+    if args.output:
+        args.output.write_text(results + '\n')
+    else:
+        print(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measure interpreter startup and import cost of the no-op PostToolUse hook.
+
+Usage:
+    startup.py [--runs 30] [--count 100] [--scripts DIR]
+
+The corpus is unchanged between runs, so every run is answered by the
+fingerprint fast path and the time is almost all startup. Variants:
+
+    python:   bare interpreter start (`python3 -c pass`), for reference
+    source:   no bytecode cache and PYTHONDONTWRITEBYTECODE=1, so every
+              module is compiled on each run (containers often set it)
+    pyc:      modules precompiled, as sync-scripts.sh installs them
+    launcher: precompiled, run as `python3 -S -E` like the skill's hook
+
+--scripts benchmarks another copy of the scripts (e.g. a checkout of an
+older version) instead of this skill's.
+"""
+
+import argparse
+import compileall
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from generate_corpus import SKILL_SCRIPTS_DIR, generate_corpus
+from hook_noop import HOOK_INPUT, summarize
+
+
+def run_hook(script: Path, env: dict, flags: list[str]) -> float:
+    """Run the hook once and return its wall time in milliseconds."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *flags, str(script), 'hook'], input=HOOK_INPUT, text=True,
+                            env=env, capture_output=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        sys.exit(f"hook failed ({result.returncode}): {result.stderr}")
+    return elapsed
+
+
+def count_imports(script: Path, env: dict, flags: list[str]) -> int:
+    """Number of modules the hook imports, from -X importtime."""
+    result = subprocess.run([sys.executable, *flags, '-X', 'importtime', str(script), 'hook'],
+                            input=HOOK_INPUT, text=True, env=env, capture_output=True)
+    return sum(line.startswith('import time:') for line in result.stderr.splitlines()) - 1  # Minus header
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hook startup")
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--count', type=int, default=100, help="AGDs in the generated corpus")
+    parser.add_argument('--scripts', type=Path, default=SKILL_SCRIPTS_DIR, help="Scripts directory to benchmark")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp)
+        generate_corpus(project_dir, args.count)
+        scripts_dir = project_dir / '.agents' / 'scripts'
+        scripts_dir.mkdir(parents=True, exist_ok=True)
+        for script in args.scripts.glob('*.py'):
+            shutil.copy2(script, scripts_dir / script.name)
+        script = scripts_dir / 'agent-centric.py'
+
+        env = dict(os.environ, CLAUDE_PROJECT_DIR=str(project_dir), PYTHONDONTWRITEBYTECODE='1')
+        run_hook(script, env, [])  # Store the fingerprint
+
+        variants = {}
+        variants['source'] = [run_hook(script, env, []) for _ in range(args.runs)]
+        compileall.compile_dir(scripts_dir, quiet=1)
+        variants['pyc'] = [run_hook(script, env, []) for _ in range(args.runs)]
+        variants['launcher'] = [run_hook(script, env, ['-S', '-E']) for _ in range(args.runs)]
+
+        python = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', 'pass'], check=True)
+            python.append((time.perf_counter() - start) * 1000)
+
+        print(f"No-op hook startup, {args.scripts}")
+        summarize('python', python)
+        for name, samples in variants.items():
+            summarize(name, samples)
+        print(f"modules imported: {count_imports(script, env, [])} (launcher: {count_imports(script, env, ['-S', '-E'])})")
+
+
+if __name__ == '__main__':
+    main()
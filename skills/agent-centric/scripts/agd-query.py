@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Query AGDs by tag and relation without grepping the Markdown indexes.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Usage:
+    agd-query.py tag TAG [TAG ...]              # AGDs with all tags (exact match)
+    agd-query.py tag TAG [TAG ...] --any        # AGDs with any of the tags
+    agd-query.py relations AGD-001              # Direct relations in both directions
+    agd-query.py supersedes AGD-001 [-r]        # AGDs that obsolete/update AGD-001 (-r: recursively)
+    agd-query.py superseded-by AGD-005 [-r]     # AGDs that AGD-005 obsoletes/updates
+    agd-query.py search "full text" [--limit N] # Ranked full-text search (needs sqliteIndex)
+
+Options:
+    --type o|u           Only follow obsoletes (o) or updates (u) relations
+    --project-dir DIR    Project directory (default: $CLAUDE_PROJECT_DIR)
+
+Output uses the same paths and `-(o)->` / `-(u)->` notation as the index files.
+Exit code 1 if nothing matched.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from query import QueryIndex, load_query_index, relative_path
+from utils import get_project_dir
+
+
+def format_edge(source: str, rel_type: str, target: str) -> str:
+    return f"{relative_path(source)} -({rel_type})-> {relative_path(target)}"
+
+
+def resolve_or_exit(query_index: QueryIndex, ref: str) -> str:
+    name = query_index.resolve(ref)
+    if not name:
+        print(f"Error: {ref} not found", file=sys.stderr)
+        sys.exit(2)
+    return name
+
+
+def run_search(project_dir: Path, text: str, limit: int) -> int:
+    from sqlite_index import search
+
+    try:
+        results = search(project_dir, text, limit)
+    except FileNotFoundError:
+        print('Error: no index.sqlite. Set "sqliteIndex": true in .agents/config.json '
+              'and run generate-index.py', file=sys.stderr)
+        return 2
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    for name, title, snippet in results:
+        print(f"{relative_path(name)}: {title}")
+        print(f"    {' '.join(snippet.split())}")
+    return 0 if results else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='agd-query.py', description="Query AGDs by tag and relation")
+    parser.add_argument('--project-dir', help="Project directory (default: $CLAUDE_PROJECT_DIR)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    tag_parser = subparsers.add_parser('tag', help="AGDs with the given tags")
+    tag_parser.add_argument('tags', nargs='+')
+    tag_parser.add_argument('--any', action='store_true', help="Match any tag instead of all")
+
+    relations_parser = subparsers.add_parser('relations', help="Direct relations of an AGD")
+    relations_parser.add_argument('agd')
+
+    for command, help_text in (('supersedes', "AGDs that obsolete/update the given AGD"),
+                               ('superseded-by', "AGDs the given AGD obsoletes/updates")):
+        sub = subparsers.add_parser(command, help=help_text)
+        sub.add_argument('agd')
+        sub.add_argument('-r', '--recursive', action='store_true', help="Follow relations transitively")
+
+    search_parser = subparsers.add_parser('search', help="Full-text search over titles, descriptions and bodies")
+    search_parser.add_argument('text')
+    search_parser.add_argument('--limit', type=int, default=10)
+
+    for sub in subparsers.choices.values():
+        if sub not in (tag_parser, search_parser):
+            sub.add_argument('--type', choices=['o', 'u'], help="Only obsoletes (o) or updates (u)")
+
+    args = parser.parse_args()
+    project_dir = get_project_dir([args.project_dir] if args.project_dir else [])
+    if args.command == 'search':
+        sys.exit(run_search(project_dir, args.text, args.limit))
+
+    query_index = load_query_index(project_dir)
+
+    if args.command == 'tag':
+        tags = [t.lstrip('#') for t in args.tags]
+        lines = [relative_path(name) for name in query_index.by_tags(tags, match_any=args.any)]
+    elif args.command == 'relations':
+        name = resolve_or_exit(query_index, args.agd)
+        lines = [format_edge(*edge) for edge in query_index.traverse(name, incoming=False, types=args.type)]
+        lines += [format_edge(*edge) for edge in query_index.traverse(name, incoming=True, types=args.type)]
+    else:
+        name = resolve_or_exit(query_index, args.agd)
+        edges = query_index.traverse(name, incoming=args.command == 'supersedes', types=args.type,
+                                     recursive=args.recursive)
+        lines = [format_edge(*edge) for edge in edges]
+
+    for line in lines:
+        print(line)
+    sys.exit(0 if lines else 1)
+
+
+if __name__ == '__main__':
+    main()
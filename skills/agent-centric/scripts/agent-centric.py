@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Command-line entry point for the Agent Centric framework.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Usage:
+    agent-centric.py hook [project_dir]                      # PostToolUse hook: validate + index
+    agent-centric.py allocate [project_dir] [--create NAME]  # Reserve the next AGD number
+    agent-centric.py daemon [project_dir]                    # Resident daemon serving hooks (optional)
+
+The hook command loads the AGD corpus once, validates it and regenerates the
+index files in the same process. It reads the hook JSON from stdin and skips
+all work when the tool call cannot have touched the decisions directory, or
+when the corpus fingerprint (see fingerprint.py) is unchanged since the last
+successful run. With `codeReferences`, the fingerprint includes the stat
+of the git index and of the cached citations (see code_refs_state() in
+code_refs.py); source files are rescanned only when the git index changed
+since the last scan. If a daemon is
+running (see daemon.py), the hook only forwards the call to it over a Unix
+socket. Concurrent hook calls are coalesced (see locking.py): while one
+rebuild runs, others wait for it, and it repeats until no further changes
+are pending; every caller then reports the result of a rebuild that included
+its own change.
+
+With `codeReferences` enabled in config.json, a Write/Edit outside the
+decisions directory has the AGD citations of the written file checked (see
+code_refs.py); nothing else is loaded.
+
+Exit codes (hook):
+- 0: Valid (indexes regenerated)
+- 2: Invalid, validation errors found (blocking - Claude will process); a
+     hook call that waited for a concurrent rebuild exits 2 if that rebuild
+     found errors, even if they were caused by another call's edit
+"""
+
+from stats import run_main  # First, so that --stats can time the other imports
+
+import sys
+from pathlib import Path
+
+from fingerprint import FingerprintStore, corpus_fingerprint, files_fingerprint, stat_decisions, with_code_refs_state
+from utils import (
+    INDEX_FILES,
+    get_agents_dir,
+    get_project_dir,
+    hook_agd_file,
+    hook_file_path,
+    hook_touches_decisions,
+    load_config,
+    read_hook_input,
+)
+
+
+def run_hook(project_dir: Path, hook_input: dict) -> int:
+    """Validate and regenerate indexes for one hook call. Returns the exit code."""
+    if not hook_touches_decisions(project_dir, hook_input):
+        return run_code_hook(project_dir, hook_file_path(hook_input))
+
+    from daemon_client import request_hook
+    answer = request_hook(project_dir, hook_input)
+    if answer is not None:
+        exit_code, stderr = answer
+        if stderr:
+            print(stderr, file=sys.stderr)
+        return exit_code
+
+    # Fast path: nothing changed since the last successful run
+    store = FingerprintStore(project_dir)
+    fingerprint = with_code_refs_state(project_dir, corpus_fingerprint(project_dir))
+    if store.matches('hook', f"{fingerprint}+{files_fingerprint(project_dir, INDEX_FILES)}"):
+        return 0
+
+    # If another hook is already rebuilding, wait for it: it picks up our
+    # changes too, and its errors are ours to report
+    from locking import run_coalesced
+    changed = hook_agd_file(project_dir, hook_input)
+    errors = run_coalesced(project_dir, lambda: rebuild(project_dir, changed))
+    if errors:
+        from validation import report_errors
+        report_errors(errors)
+        return 2
+    return 0
+
+
+def run_code_hook(project_dir: Path, file_path: str) -> int:
+    """Check the AGD citations of a source file written by a hook call, if
+    codeReferences is enabled. Returns the exit code."""
+    config = load_config(get_agents_dir(project_dir) / 'config.json') or {}
+    if not config.get('codeReferences'):
+        return 0
+
+    from code_refs import check_edited_file
+    errors = check_edited_file(project_dir, config, file_path)
+    if errors:
+        from validation import report_errors
+        report_errors(errors)
+        return 2
+    return 0
+
+
+def rebuild(project_dir: Path, changed: str | None = None) -> list:
+    """Validate and regenerate indexes. Returns the validation errors (AgdError).
+
+    When nothing changed since the last run, its result is returned without
+    loading the corpus: [] after a clean run, else the recorded errors. If
+    the hook call wrote the single AGD file `changed`, only that file and
+    the AGDs related to it are validated when possible (see
+    validate_scoped() in validation.py); a full validation refreshes the
+    reference map that makes this possible.
+    """
+    store = FingerprintStore(project_dir)
+    entries = stat_decisions(project_dir)
+    fingerprint = corpus_fingerprint(project_dir, entries)
+    index_stat = None
+    if (load_config(get_agents_dir(project_dir) / 'config.json') or {}).get('codeReferences'):
+        from code_refs import git_index_stat
+        index_stat = git_index_stat(project_dir)  # Taken before any scan, like the fingerprint
+    sources = with_code_refs_state(project_dir, fingerprint, index_stat)
+    state = f"{sources}+{files_fingerprint(project_dir, INDEX_FILES)}"
+    if store.matches('hook', state):
+        return []
+
+    # Imported here so the fast path does not pay for them
+    from corpus import AgdError, load_corpus
+    from indexes import generate_indexes
+    from validation import save_reference_map, validate_corpus, validate_scoped
+
+    stored = store.stored_errors('hook', state)
+    if stored is not None:
+        return [AgdError(**error) for error in stored]
+
+    errors = validate_scoped(project_dir, changed, entries) if changed and entries is not None else None
+    corpus = load_corpus(project_dir, fingerprint=fingerprint)
+    if not corpus.exists:
+        return []
+    if index_stat is not None:
+        from code_refs import hook_code_refs
+        corpus.code_refs = hook_code_refs(project_dir, corpus.config, index_stat)
+
+    if errors is None:
+        errors = validate_corpus(corpus)
+        save_reference_map(corpus, errors)
+    generate_indexes(corpus)
+
+    # Stat the corpus as it was before loading, so edits made during this
+    # run are picked up by the next one; code-refs.json as this run left it
+    sources = with_code_refs_state(project_dir, fingerprint, index_stat)
+    state = f"{sources}+{files_fingerprint(project_dir, INDEX_FILES)}"
+    if errors:
+        store.store_errors('hook', state, [error.to_dict() for error in errors])
+    else:
+        store.store('hook', state)
+    return errors
+
+
+def cmd_hook(args: 'argparse.Namespace') -> int:
+    project_dir = get_project_dir([args.project_dir] if args.project_dir else [])
+    return run_hook(project_dir, read_hook_input())
+
+
+def cmd_allocate(args: 'argparse.Namespace') -> int:
+    import re
+    from utils import allocate_agd_id
+
+    if args.create and not re.fullmatch(r'[a-z0-9]+(-[a-z0-9]+)*', args.create):
+        print(f"Error: '{args.create}' is not a kebab-case name", file=sys.stderr)
+        return 1
+    project_dir = get_project_dir([args.project_dir] if args.project_dir else [])
+    agd_id, path = allocate_agd_id(project_dir, args.create)
+    print(path if path else agd_id)
+    return 0
+
+
+def cmd_daemon(args: 'argparse.Namespace') -> int:
+    from daemon import run_daemon
+    project_dir = get_project_dir([args.project_dir] if args.project_dir else [])
+    return run_daemon(project_dir, args.poll)
+
+
+def main():
+    # The hook runs after every tool call: dispatch it before importing
+    # argparse, whose help formatter alone pulls in shutil and compression modules
+    argv = sys.argv[1:]
+    if argv[:1] == ['hook'] and len(argv) <= 2 and not any(arg.startswith('-') for arg in argv):
+        sys.exit(run_hook(get_project_dir(argv[1:]), read_hook_input()))
+
+    import argparse
+    parser = argparse.ArgumentParser(prog='agent-centric.py', description="Agent Centric framework tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    hook_parser = subparsers.add_parser('hook', help="PostToolUse hook: validate AGDs and regenerate indexes")
+    hook_parser.add_argument('project_dir', nargs='?', help="Project directory (default: $CLAUDE_PROJECT_DIR)")
+    hook_parser.set_defaults(func=cmd_hook)
+
+    allocate_parser = subparsers.add_parser('allocate', help="Reserve the next AGD number and print it")
+    allocate_parser.add_argument('project_dir', nargs='?', help="Project directory (default: $CLAUDE_PROJECT_DIR)")
+    allocate_parser.add_argument('--create', metavar='NAME',
+                                 help="Also create AGD-NNN_NAME.md (kebab-case) and print its path")
+    allocate_parser.set_defaults(func=cmd_allocate)
+
+    daemon_parser = subparsers.add_parser('daemon', help="Keep the corpus in memory and serve hooks over a Unix socket")
+    daemon_parser.add_argument('project_dir', nargs='?', help="Project directory (default: $CLAUDE_PROJECT_DIR)")
+    daemon_parser.add_argument('--poll', type=float, metavar='SECONDS',
+                               help="Poll for changes at this interval instead of using inotify")
+    daemon_parser.set_defaults(func=cmd_daemon)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    run_main('agent-centric', main)
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+AGD citations in project source code (`# Implementation follows AGD-001`).
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Enabled with `"codeReferences": true` in config.json. Then:
+    - generate_indexes() writes INDEX-CODE-REFS.md, each cited AGD with the
+      `path:line` of its citations
+    - validate_corpus() reports citations of AGDs that do not exist
+      (dangling_citation) or are obsoleted (obsolete_citation)
+    - the hook checks a source file after a Write/Edit call changed it
+      (check_edited_file()), without listing or scanning anything else
+    - other hook calls (Bash, AGD edits) do not scan either: they go by the
+      stat of the git index and of code-refs.json (code_refs_state()), and
+      rescan only when the git index changed since the last full scan
+      (hook_code_refs()); edits to source files that neither go through
+      Write/Edit nor touch the git index are picked up by the next
+      generate-index.py or validate-agds.py run
+
+Files come from `git ls-files --cached --others --exclude-standard`, so
+.gitignore is respected (outside a git repository: a walk that skips hidden
+directories and node_modules). Only files with a known comment syntax are
+scanned: DEFAULT_COMMENT_STYLES by extension or file name, adjusted by
+codeReferencesComments (so Markdown and other prose is not scanned by
+default). Skipped: .agents/, nested projects (directories with their own
+.agents/config.json), paths matching a codeReferencesExclude pattern, binary
+files (a NUL byte in the first 8000 bytes) and files over MAX_SOURCE_BYTES.
+
+A citation is `AGD-<digits>` not preceded by a letter, digit, '_', '-' or
+':', inside a comment: after a line comment marker that is not within
+quotes on the same line, or within a block comment. IDs in strings and
+docstrings are not citations. `pkg:AGD-012` names another project's AGD
+and is not checked.
+
+Scan results are cached in .agents/.cache/, keyed by path and (mtime_ns, size, style):
+    - code-files.json:  signature of every scanned file
+    - code-refs.json:   path -> [[line, AGD ID], ...] for files citing an AGD
+A run reads only the files changed since the last one, on a thread pool
+(see loaderThreads), and records the git index stat it started from in
+fingerprint.json (slot SCAN_SLOT).
+"""
+
+import bisect
+import fnmatch
+import json
+import os
+import re
+import stat
+from pathlib import Path
+
+# corpus, graph and subprocess are imported where needed: a hook call for a
+# file without citations must stay cheap
+from stats import STATS
+from utils import (
+    AGENTS_DIR,
+    CODE_REFS_INDEX,
+    DECISIONS_DIR,
+    MAX_LOADER_THREADS,
+    SKIPPED_DIRS,
+    AgdResolver,
+    AtomicWriter,
+    atomic_write_text,
+    get_agd_id,
+    get_agents_dir,
+    get_cache_dir,
+    get_decisions_dir,
+    load_config,
+    parallel_map,
+    worker_count,
+)
+
+CODE_REFS_VERSION = 2
+FILES_CACHE = 'code-files.json'
+REFS_CACHE = 'code-refs.json'
+MAX_SOURCE_BYTES = 2 * 1024 * 1024
+SCAN_SLOT = 'code-scan'  # FingerprintStore slot: git index stat at the last full scan
+_BINARY_PROBE_BYTES = 8000
+_NESTED_CONFIG = f"/{AGENTS_DIR}/config.json"
+
+CITATION_RE = re.compile(rb'(?<![\w:-])AGD-\d+')
+
+# style -> (line comment markers, block comment delimiters, delimiters of
+# strings that are not comments, quote characters)
+COMMENT_STYLES = {
+    'hash': ((b'#',), (), (), b'"\'`'),
+    'python': ((b'#',), (), ((b'"""', b'"""'), (b"'''", b"'''")), b'"\''),
+    'slash': ((b'//',), ((b'/*', b'*/'),), (), b'"\'`'),
+    'dash': ((b'--',), (), (), b'"\''),
+    'semicolon': ((b';',), (), (), b'"'),
+    'percent': ((b'%',), (), (), b''),
+    'css': ((), ((b'/*', b'*/'),), (), b''),
+    'html': ((), ((b'<!--', b'-->'),), (), b''),
+}
+# Extension (lower case) or file name -> style
+DEFAULT_COMMENT_STYLES = {
+    **dict.fromkeys(('.sh', '.bash', '.zsh', '.fish', '.rb', '.pl', '.pm', '.r', '.yaml', '.yml', '.toml',
+                     '.tf', '.nix', '.ps1', '.ex', '.exs', '.jl', '.cmake', 'Makefile', 'Dockerfile'), 'hash'),
+    **dict.fromkeys(('.py', '.pyi', '.pyx'), 'python'),
+    **dict.fromkeys(('.c', '.h', '.cc', '.cpp', '.cxx', '.hh', '.hpp', '.cs', '.java', '.js', '.jsx', '.mjs',
+                     '.cjs', '.ts', '.tsx', '.go', '.rs', '.swift', '.kt', '.kts', '.scala', '.dart', '.php',
+                     '.groovy', '.gradle', '.proto', '.scss', '.less', '.zig'), 'slash'),
+    **dict.fromkeys(('.sql', '.lua', '.hs', '.elm'), 'dash'),
+    **dict.fromkeys(('.lisp', '.el', '.clj', '.cljs', '.cljc', '.scm'), 'semicolon'),
+    **dict.fromkeys(('.tex', '.erl'), 'percent'),
+    '.css': 'css',
+    **dict.fromkeys(('.html', '.htm', '.xml'), 'html'),
+}
+
+CODE_REFS_HEADER = (
+    "# AGD Code References\n\n"
+    "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
+    "<!-- AGD: path:line of each citation in source code (paths relative to the project root) -->\n"
+    "<!-- Search with: grep \"AGD-001_\" INDEX-CODE-REFS.md -->\n\n"
+)
+
+
+def _exclude_re(config: dict) -> re.Pattern | None:
+    patterns = config.get('codeReferencesExclude')
+    if not isinstance(patterns, list):
+        return None
+    patterns = [fnmatch.translate(p) for p in patterns if isinstance(p, str)]
+    return re.compile('|'.join(patterns)) if patterns else None
+
+
+def comment_styles(config: dict) -> dict[str, str]:
+    """Extension or file name -> comment style: DEFAULT_COMMENT_STYLES with
+    codeReferencesComments applied (a style name adds or changes an entry,
+    null removes it; unknown styles are ignored)."""
+    styles = dict(DEFAULT_COMMENT_STYLES)
+    overrides = config.get('codeReferencesComments')
+    if isinstance(overrides, dict):
+        for key, style in overrides.items():
+            if style is None:
+                styles.pop(key, None)
+            elif style in COMMENT_STYLES:
+                styles[key] = style
+    return styles
+
+
+def file_style(styles: dict[str, str], path: str) -> str | None:
+    """The comment style of path (see comment_styles()), or None if it is not scanned."""
+    name = path.rpartition('/')[2]
+    if name in styles:
+        return styles[name]
+    ext = os.path.splitext(name)[1].lower()
+    return styles.get(ext) if ext else None
+
+
+def _git_files(project_dir: Path) -> list[str] | None:
+    """Tracked and untracked, not ignored files under project_dir, or None
+    if git cannot list them (not a repository, git missing)."""
+    import subprocess
+    try:
+        result = subprocess.run(['git', '-C', str(project_dir), 'ls-files', '-z', '--cached', '--others',
+                                 '--exclude-standard'], capture_output=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return list(dict.fromkeys(path for path in os.fsdecode(result.stdout).split('\0') if path))
+
+
+def _walk_files(project_dir: Path) -> list[str]:
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(project_dir):
+        prefix = os.path.relpath(dirpath, project_dir).replace(os.sep, '/') + '/'
+        if prefix == './':
+            prefix = ''
+        elif os.path.isfile(os.path.join(dirpath, AGENTS_DIR, 'config.json')):
+            dirnames[:] = []  # Nested project
+            continue
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in SKIPPED_DIRS]
+        paths.extend(prefix + name for name in filenames)
+    return sorted(paths)
+
+
+def list_source_files(project_dir: Path, config: dict) -> dict[str, str]:
+    """Files to scan, relative to project_dir with '/' separators, in path
+    order, with their comment style."""
+    paths = _git_files(project_dir)
+    if paths is None:
+        paths = _walk_files(project_dir)
+    skipped = (f"{AGENTS_DIR}/", *(p[:-len(_NESTED_CONFIG) + 1] for p in paths if p.endswith(_NESTED_CONFIG)))
+    exclude = _exclude_re(config)
+    styles = comment_styles(config)
+    files = {}
+    for path in sorted(paths):
+        style = file_style(styles, path)
+        if style and not path.startswith(skipped) and not (exclude and exclude.match(path)):
+            files[path] = style
+    return files
+
+
+def _spans(data: bytes, delimiters: tuple) -> list[tuple[int, int]]:
+    """(start, end) of each delimited region of data, in order; an unclosed
+    one runs to the end."""
+    if not delimiters:
+        return []
+    pattern = b'|'.join(re.escape(start) + b'.*?(?:' + re.escape(end) + rb'|\Z)' for start, end in delimiters)
+    return [match.span() for match in re.finditer(pattern, data, re.DOTALL)]
+
+
+def _within(spans: list[tuple[int, int]], pos: int) -> bool:
+    i = bisect.bisect_right(spans, (pos, float('inf'))) - 1  # Last span starting at or before pos
+    return i >= 0 and pos < spans[i][1]
+
+
+def _after_marker(data: bytes, pos: int, markers: tuple[bytes, ...], quotes: bytes) -> bool:
+    """Whether a line comment marker outside quotes precedes pos on its line."""
+    i = data.rfind(b'\n', 0, pos) + 1
+    quote = None
+    while i < pos:
+        c = data[i]
+        if quote is not None:
+            if c == 0x5c:  # Backslash escapes the next character
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in quotes:
+            quote = c
+        elif data.startswith(markers, i):
+            return True
+        i += 1
+    return False
+
+
+def scan_file(path: str, style: str) -> list[list]:
+    """[[line, AGD ID], ...] cited in comments of the file at path (see
+    COMMENT_STYLES), in order (each ID once per line). Empty if it cites
+    none or is binary, too large or unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(MAX_SOURCE_BYTES + 1)
+    except OSError:
+        return []
+    if len(data) > MAX_SOURCE_BYTES or b'\0' in data[:_BINARY_PROBE_BYTES] or b'AGD-' not in data:
+        return []
+
+    markers, blocks, strings, quotes = COMMENT_STYLES[style]
+    comments = _spans(data, blocks)
+    literals = _spans(data, strings)
+    citations = []
+    seen = set()
+    line = 1
+    pos = 0
+    for match in CITATION_RE.finditer(data):
+        line += data.count(b'\n', pos, match.start())
+        pos = match.start()
+        if not (_within(comments, pos) or (markers and not _within(literals, pos)
+                                           and _after_marker(data, pos, markers, quotes))):
+            continue
+        citation = (line, match.group().decode())
+        if citation not in seen:
+            seen.add(citation)
+            citations.append(list(citation))
+    return citations
+
+
+def _load_json(path: Path) -> dict | None:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != CODE_REFS_VERSION:
+        return None
+    entries = data.get('entries')
+    return entries if isinstance(entries, dict) else None
+
+
+class CodeRefCache:
+    """Signatures of scanned source files and the citations found in them."""
+
+    def __init__(self, project_dir: Path, load_files: bool = True):
+        cache_dir = get_cache_dir(project_dir)
+        self.files_path = cache_dir / FILES_CACHE
+        self.refs_path = cache_dir / REFS_CACHE
+        refs = _load_json(self.refs_path)
+        self.refs: dict[str, list[list]] = refs or {}
+        # Without the citations, a matching signature would hide them
+        files = _load_json(self.files_path) if load_files and refs is not None else None
+        self.files: dict[str, list] = files or {}
+
+    def _save(self, path: Path, entries: dict) -> None:
+        try:
+            atomic_write_text(path, json.dumps({'version': CODE_REFS_VERSION, 'entries': entries},
+                                               separators=(',', ':')))
+        except OSError:
+            pass  # Only an optimization; the next run rescans
+
+    def save(self, files: bool = True) -> None:
+        # Citations first: if the signatures were written alone, files
+        # changed since would count as unchanged
+        self._save(self.refs_path, self.refs)
+        if files:
+            self._save(self.files_path, self.files)
+
+
+def git_index_stat(project_dir: Path) -> str:
+    """Stat of the index of the git repository containing project_dir (found
+    without running git), or '' outside one. Commits, checkouts, merges and
+    staging rewrite the index."""
+    project_dir = project_dir.absolute()
+    for parent in (project_dir, *project_dir.parents):
+        dot_git = parent / '.git'
+        if dot_git.is_dir():
+            index = dot_git / 'index'
+        elif dot_git.is_file():  # Worktree or submodule: "gitdir: <path>"
+            try:
+                gitdir = dot_git.read_text().strip()
+            except OSError:
+                return ''
+            if not gitdir.startswith('gitdir:'):
+                return ''
+            index = parent / gitdir[len('gitdir:'):].strip() / 'index'
+        else:
+            continue
+        try:
+            st = os.stat(index)
+        except OSError:
+            return ''
+        return f"{st.st_mtime_ns}:{st.st_size}"
+    return ''
+
+
+def code_refs_state(project_dir: Path, index_stat: str | None = None) -> str:
+    """Cheap stand-in for the citations in source code: the git index stat
+    (index_stat if already taken) and the stat of code-refs.json, which
+    check_edited_file() and scans rewrite when citations change."""
+    if index_stat is None:
+        index_stat = git_index_stat(project_dir)
+    try:
+        st = os.stat(get_cache_dir(project_dir) / REFS_CACHE)
+        refs_stat = f"{st.st_mtime_ns}:{st.st_size}"
+    except OSError:
+        refs_stat = '-'
+    return f"{index_stat or '-'}+{refs_stat}"
+
+
+def hook_code_refs(project_dir: Path, config: dict, index_stat: str) -> dict[str, list[list]]:
+    """Citations for a hook rebuild: the cached ones if the git index
+    (index_stat) is unchanged since the last full scan, else a full scan."""
+    from fingerprint import FingerprintStore
+    if FingerprintStore(project_dir).matches(SCAN_SLOT, index_stat):
+        refs = _load_json(get_cache_dir(project_dir) / REFS_CACHE)
+        if refs is not None:
+            return refs
+    return scan_code_refs(project_dir, config)
+
+
+def scan_code_refs(project_dir: Path, config: dict) -> dict[str, list[list]]:
+    """Citations of every source file citing an AGD: path -> [[line, AGD ID], ...],
+    in path order. Only files whose (mtime_ns, size) changed are read."""
+    from fingerprint import FingerprintStore
+    index_stat = git_index_stat(project_dir)  # Before listing, so changes during the scan count
+    with STATS.phase('code_refs'):
+        refs = _scan_code_refs(project_dir, config)
+    store = FingerprintStore(project_dir)
+    if index_stat and not store.matches(SCAN_SLOT, index_stat):
+        store.store(SCAN_SLOT, index_stat)
+    return refs
+
+
+def _scan_code_refs(project_dir: Path, config: dict) -> dict[str, list[list]]:
+    styles = list_source_files(project_dir, config)
+    paths = list(styles)
+    cache = CodeRefCache(project_dir)
+    root = os.path.join(project_dir, '')
+
+    def probe(path: str) -> tuple[list, list[list], bool] | None:
+        """(signature, citations, hit), or None if path is not a regular file.
+        Only reads cache state, so it is safe on several threads at once."""
+        full_path = root + path
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        # The style is part of the signature: a changed codeReferencesComments
+        # entry rescans the files it applies to
+        signature = [st.st_mtime_ns, st.st_size, styles[path]]
+        if cache.files.get(path) == signature:
+            return signature, cache.refs.get(path, []), True
+        return signature, scan_file(full_path, styles[path]), False
+
+    workers = worker_count(config, 'loaderThreads', len(paths),
+                           default=min(MAX_LOADER_THREADS, os.cpu_count() or 1))
+    files = {}
+    refs = {}
+    read = 0
+    for path, result in zip(paths, parallel_map(probe, paths, workers)):
+        if result is None:
+            continue
+        files[path], citations, hit = result
+        read += not hit
+        if citations:
+            refs[path] = citations
+
+    if STATS.enabled:
+        STATS.count('source_files_read', read)
+    if files != cache.files or refs != cache.refs:
+        cache.files = files
+        cache.refs = refs
+        cache.save()
+    return refs
+
+
+def code_refs_lines(refs: dict[str, list[list]], resolver: AgdResolver) -> list[str]:
+    """INDEX-CODE-REFS.md body lines, in AGD order; citations of AGDs that do
+    not exist are left to validation."""
+    by_id: dict[str, list[str]] = {}
+    for path in sorted(refs):
+        for line, agd_id in refs[path]:
+            by_id.setdefault(agd_id, []).append(f"{path}:{line}")
+    return [f"{DECISIONS_DIR}/{target.name}: {', '.join(by_id[agd_id])}\n"
+            for agd_id, target in resolver.by_id.items() if agd_id in by_id]
+
+
+def _write_index(agents_dir: Path, resolver: AgdResolver, refs: dict[str, list[list]]) -> None:
+    with AtomicWriter(agents_dir / CODE_REFS_INDEX, keep_unchanged=True) as writer:
+        writer.write(CODE_REFS_HEADER)
+        for line in code_refs_lines(refs, resolver):
+            writer.write(line)
+
+
+def write_code_refs_index(corpus: 'Corpus') -> None:
+    """Write INDEX-CODE-REFS.md from the corpus's scan; left untouched if unchanged."""
+    _write_index(corpus.agents_dir, corpus.resolver, corpus.code_refs)
+
+
+def update_code_refs_index(project_dir: Path) -> None:
+    """Rescan source files and rewrite INDEX-CODE-REFS.md, if enabled, when the
+    AGDs themselves are unchanged (no corpus is loaded)."""
+    config = load_config(get_agents_dir(project_dir) / 'config.json') or {}
+    if config.get('codeReferences'):
+        _write_index(get_agents_dir(project_dir), AgdResolver(get_decisions_dir(project_dir)),
+                     scan_code_refs(project_dir, config))
+
+
+def citation_errors(refs: dict[str, list[list]], resolver: AgdResolver,
+                    graph: 'RelationGraph | None' = None) -> list['AgdError']:
+    """Citations of AGDs that do not exist or, if graph is given, are
+    obsoleted. In path and line order."""
+    from corpus import AgdError
+    from graph import STATUS_OBSOLETED
+
+    errors = []
+    for path in sorted(refs):
+        for line, agd_id in refs[path]:
+            target = resolver.by_id.get(agd_id)
+            if target is None:
+                errors.append(AgdError(path, 'dangling_citation', f"cites non-existent {agd_id}",
+                                       value=agd_id, line=line))
+            elif graph is not None and graph.status(target.name) == STATUS_OBSOLETED:
+                latest = graph.latest(target.name)
+                hint = f" (superseded by {get_agd_id(latest)})" if latest else ''
+                errors.append(AgdError(path, 'obsolete_citation', f"cites obsoleted {agd_id}{hint}",
+                                       value=agd_id, line=line))
+    return errors
+
+
+def validate_code_refs(corpus: 'Corpus') -> list['AgdError']:
+    """Dangling and obsoleted citations in the project's source files."""
+    return citation_errors(corpus.code_refs, corpus.resolver, corpus.graph)
+
+
+def _in_nested_project(project_dir: Path, path: Path) -> bool:
+    for parent in path.parents:
+        if parent == project_dir:
+            return False
+        if (parent / AGENTS_DIR / 'config.json').is_file():
+            return True
+    return False
+
+
+def _is_listed(project_dir: Path, rel_path: str) -> bool:
+    """Whether a file not seen by the last scan would be listed (not ignored)."""
+    import subprocess
+    try:
+        result = subprocess.run(['git', '-C', str(project_dir), 'ls-files', '-z', '--cached', '--others',
+                                 '--exclude-standard', '--', rel_path], capture_output=True)
+    except OSError:
+        result = None
+    if result is None or result.returncode != 0:
+        return not any(part.startswith('.') or part in SKIPPED_DIRS for part in rel_path.split('/')[:-1])
+    return bool(result.stdout)
+
+
+def _update_citations(project_dir: Path, rel_path: str, citations: list[list], resolver: AgdResolver) -> None:
+    """Store one file's citations and rewrite INDEX-CODE-REFS.md."""
+    cache = CodeRefCache(project_dir, load_files=False)  # Reloaded under the lock
+    if citations:
+        cache.refs[rel_path] = citations
+    else:
+        cache.refs.pop(rel_path, None)
+    # code-files.json keeps the old signature, so the next scan rereads the file
+    cache.save(files=False)
+    _write_index(get_agents_dir(project_dir), resolver, cache.refs)
+
+
+def check_edited_file(project_dir: Path, config: dict, file_path: str) -> list['AgdError']:
+    """Rescan one source file a hook call wrote, update the cached citations
+    and INDEX-CODE-REFS.md, and return the file's citation errors."""
+    with STATS.phase('code_refs'):
+        return _check_edited_file(project_dir, config, file_path)
+
+
+def _check_edited_file(project_dir: Path, config: dict, file_path: str) -> list['AgdError']:
+    project_dir = project_dir.resolve()
+    path = Path(file_path).resolve()
+    try:
+        rel_path = path.relative_to(project_dir).as_posix()
+    except ValueError:
+        return []  # Outside the project
+    exclude = _exclude_re(config)
+    if (rel_path.startswith(f"{AGENTS_DIR}/") or (exclude and exclude.match(rel_path))
+            or _in_nested_project(project_dir, path)):
+        return []
+
+    style = file_style(comment_styles(config), rel_path)
+    citations = scan_file(str(path), style) if style else []  # Empty if it was deleted
+    cache = CodeRefCache(project_dir, load_files=False)
+    previous = cache.refs.get(rel_path, [])
+    if not citations and not previous:
+        return []
+
+    resolver = AgdResolver(get_decisions_dir(project_dir))
+    if previous != citations:
+        # A file the last scan did not list may be ignored by git
+        if rel_path not in cache.refs and not _is_listed(project_dir, rel_path):
+            return []
+        # Under the hook lock, so a concurrent rebuild cannot interleave
+        # its index writes with ours
+        from locking import run_locked
+        run_locked(project_dir, lambda: _update_citations(project_dir, rel_path, citations, resolver))
+
+    graph = None
+    if any(agd_id in resolver.by_id for _, agd_id in citations):
+        from corpus import load_corpus
+        graph = load_corpus(project_dir).graph
+    return citation_errors({rel_path: citations}, resolver, graph)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Optional resident daemon that answers PostToolUse hooks from memory.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Usage:
+    agent-centric.py daemon [project_dir]               # inotify, polling fallback
+    agent-centric.py daemon [project_dir] --poll 2      # force polling every 2s
+
+The daemon keeps the parsed corpus, resolver and validation result in memory
+and updates them from inotify events on .agents/decisions and
+.agents/config.json (or by polling the corpus fingerprint where inotify is
+unavailable). Indexes are regenerated after each batch of changes. Source
+files are not watched: with `codeReferences`, each hook request compares
+the stat of the git index and of the cached citations (code_refs_state() in
+code_refs.py), and reloads or rescans the citations when it changed.
+
+`agent-centric.py hook` first tries the daemon's Unix socket: it sends the
+hook JSON and receives {"exit": code, "stderr": text}. If no daemon is
+listening, the hook runs in-process as before. The client side lives in
+daemon_client.py.
+"""
+
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from daemon_client import socket_path
+from fingerprint import corpus_fingerprint
+from utils import get_agents_dir, get_decisions_dir
+
+QUIET_PERIOD = 0.2           # Seconds without events before flushing pending changes
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify(7) event masks
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+@dataclass
+class Changes:
+    """Accumulated file system changes not yet applied to the corpus."""
+
+    names: set[str] = field(default_factory=set)  # AGD files whose content may have changed
+    relist: bool = False                          # Files were added, removed or renamed
+    config: bool = False                          # config.json changed
+    full: bool = False                            # Reload everything
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.relist or self.config or self.full)
+
+    def merge(self, other: 'Changes') -> None:
+        self.names |= other.names
+        self.relist |= other.relist
+        self.config |= other.config
+        self.full |= other.full
+
+
+class InotifyWatcher:
+    """Watches decisions/ and config.json through Linux inotify (via ctypes)."""
+
+    DECISIONS_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                      | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    AGENTS_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+    timeout = None
+
+    def __init__(self, project_dir: Path):
+        import ctypes
+        import ctypes.util
+
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.decisions_dir = get_decisions_dir(project_dir)
+        self.decisions_wd = self._add_watch(self.decisions_dir, self.DECISIONS_MASK)
+        self.agents_wd = self._add_watch(get_agents_dir(project_dir), self.AGENTS_MASK)
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(self._ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def read_changes(self) -> Changes:
+        changes = Changes()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode(errors='surrogateescape')
+                offset += length
+                self._record(changes, wd, mask, name)
+        return changes
+
+    def _record(self, changes: Changes, wd: int, mask: int, name: str) -> None:
+        if mask & IN_Q_OVERFLOW:
+            changes.full = True
+        elif wd == self.agents_wd:
+            if name == 'config.json':
+                changes.config = True
+        elif wd == self.decisions_wd:
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                changes.full = True
+                try:
+                    self.decisions_wd = self._add_watch(self.decisions_dir, self.DECISIONS_MASK)
+                except OSError:
+                    pass
+            elif name.startswith('AGD-') and name.endswith('.md'):
+                changes.names.add(name)
+                if mask & (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO):
+                    changes.relist = True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher comparing the corpus fingerprint at a fixed interval."""
+
+    def __init__(self, project_dir: Path, interval: float = DEFAULT_POLL_INTERVAL):
+        self.project_dir = project_dir
+        self.timeout = interval
+        self.fingerprint = corpus_fingerprint(project_dir)
+
+    def fileno(self) -> None:
+        return None
+
+    def read_changes(self) -> Changes:
+        fingerprint = corpus_fingerprint(self.project_dir)
+        if fingerprint == self.fingerprint:
+            return Changes()
+        self.fingerprint = fingerprint
+        return Changes(full=True)
+
+    def close(self) -> None:
+        pass
+
+
+class HookDaemon:
+    """Serves hook requests from an in-memory corpus kept current by a watcher."""
+
+    def __init__(self, project_dir: Path, watcher):
+        from corpus import load_corpus
+
+        self.project_dir = project_dir
+        self.watcher = watcher
+        self.pending = Changes()
+        self.corpus = load_corpus(project_dir)
+        self.errors: list = []  # AgdError, see corpus.py
+        self.code_refs_state: str | None = None  # code_refs_state() when the citations were last checked
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        from indexes import generate_indexes
+        from locking import run_locked
+        from validation import validate_corpus
+
+        self.errors = validate_corpus(self.corpus)
+        # Same lock as in-process hooks and generate-index.py, which may
+        # write the same files
+        run_locked(self.project_dir, lambda: generate_indexes(self.corpus))
+
+    def flush(self) -> None:
+        """Apply pending changes to the corpus, then revalidate and reindex."""
+        from corpus import load_corpus, refresh_corpus
+
+        self.pending.merge(self.watcher.read_changes())
+        if not self.pending:
+            return
+        changes, self.pending = self.pending, Changes()
+        if changes.full:
+            self.corpus = load_corpus(self.project_dir)
+        else:
+            self.corpus = refresh_corpus(self.corpus, changes.names, relist=changes.relist,
+                                         reload_config=changes.config)
+        self._rebuild()
+
+    def _code_refs_changed(self) -> bool:
+        """Reload the citations in source code, which are not watched, if
+        codeReferences is enabled and their state changed (see
+        hook_code_refs() in code_refs.py). Returns whether they changed."""
+        if not self.corpus.config.get('codeReferences'):
+            return False
+        from code_refs import code_refs_state, git_index_stat, hook_code_refs
+        index_stat = git_index_stat(self.project_dir)
+        if code_refs_state(self.project_dir, index_stat) == self.code_refs_state:
+            return False
+        refs = hook_code_refs(self.project_dir, self.corpus.config, index_stat)
+        self.code_refs_state = code_refs_state(self.project_dir, index_stat)
+        if refs == self.corpus.code_refs:
+            return False
+        self.corpus.code_refs = refs
+        return True
+
+    def response(self) -> dict:
+        from validation import format_errors
+
+        self.flush()
+        if self._code_refs_changed():
+            self._rebuild()
+        if self.errors:
+            return {'exit': 2, 'stderr': format_errors(self.errors)}
+        return {'exit': 0, 'stderr': ''}
+
+    def handle(self, conn: socket.socket) -> None:
+        with conn:
+            conn.settimeout(1.0)
+            try:
+                while conn.recv(65536):
+                    pass  # The request body is the hook JSON; the result does not depend on it
+                conn.sendall(json.dumps(self.response()).encode())
+            except OSError:
+                pass
+
+    def serve_forever(self, server: socket.socket) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(server, selectors.EVENT_READ, 'server')
+        if self.watcher.fileno() is not None:
+            selector.register(self.watcher, selectors.EVENT_READ, 'watcher')
+
+        while True:
+            timeout = QUIET_PERIOD if self.pending else self.watcher.timeout
+            events = selector.select(timeout)
+            for key, _ in events:
+                if key.data == 'server':
+                    conn, _ = server.accept()
+                    self.handle(conn)
+                else:
+                    self.pending.merge(self.watcher.read_changes())
+            if not events:
+                # Quiet period elapsed (or poll interval for PollingWatcher)
+                self.flush()
+
+
+def _daemon_running(path: Path) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+
+
+def run_daemon(project_dir: Path, poll_interval: float | None = None) -> int:
+    """Run the daemon in the foreground until interrupted. Returns exit code."""
+    if not get_decisions_dir(project_dir).is_dir():
+        print(f"Error: {get_decisions_dir(project_dir)} does not exist", file=sys.stderr)
+        return 1
+
+    path = socket_path(project_dir)
+    if _daemon_running(path):
+        print(f"Error: daemon already running ({path})", file=sys.stderr)
+        return 1
+
+    if poll_interval is None:
+        try:
+            watcher = InotifyWatcher(project_dir)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}), polling every {DEFAULT_POLL_INTERVAL}s", file=sys.stderr)
+            watcher = PollingWatcher(project_dir)
+    else:
+        watcher = PollingWatcher(project_dir, poll_interval)
+
+    daemon = HookDaemon(project_dir, watcher)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(16)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"agent-centric daemon listening on {path}", file=sys.stderr)
+
+    try:
+        daemon.serve_forever(server)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        path.unlink(missing_ok=True)
+        watcher.close()
+    return 0
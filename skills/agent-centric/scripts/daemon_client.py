@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Hook side of the optional daemon: find its socket and forward a hook call.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Kept apart from daemon.py so that every hook does not import the server
+(selectors, signal, dataclasses); socket is only imported when a daemon
+socket exists.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from utils import get_cache_dir
+
+SOCKET_NAME = 'daemon.sock'
+MAX_SOCKET_PATH = 100        # sun_path is 104-108 bytes depending on platform
+CLIENT_TIMEOUT = 5.0         # Seconds before a hook gives up and runs in-process
+
+
+def socket_path(project_dir: Path) -> Path:
+    """Unix socket path for a project's daemon.
+
+    Lives in .agents/.cache/ unless that path is too long for a socket
+    address, in which case a per-project name in the temp directory is used.
+    """
+    path = get_cache_dir(project_dir) / SOCKET_NAME
+    if len(os.fsencode(path)) <= MAX_SOCKET_PATH:
+        return path
+    import hashlib
+    digest = hashlib.blake2b(os.fsencode(project_dir.resolve()), digest_size=8).hexdigest()
+    return Path(os.environ.get('TMPDIR', '/tmp')) / f'agent-centric-{digest}.sock'
+
+
+def request_hook(project_dir: Path, hook_input: dict) -> tuple[int, str] | None:
+    """Send a hook call to the daemon. Returns (exit_code, stderr), or None if
+    no daemon answered and the caller should run in-process."""
+    path = socket_path(project_dir)
+    if not path.exists():
+        return None
+    import socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(hook_input).encode())
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while chunk := sock.recv(65536):
+                chunks.append(chunk)
+        response = json.loads(b''.join(chunks))
+        return int(response['exit']), str(response.get('stderr', ''))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Cheap change detection for the AGD corpus.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+A fingerprint digests the decisions directory mtime, its entry count and the
+name/mtime/size of every AGD file, plus config.json. Nothing is parsed, so
+comparing it against the value stored after the last successful run lets
+hooks exit early when the corpus is unchanged. The fingerprint starts with
+the directory mtime, for readers that only need to notice added, removed or
+renamed files (see decisions_mtime()). Callers that write files
+(the indexes) append files_fingerprint() of their outputs so that deleted
+or hand-edited indexes are regenerated.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from stats import STATS
+from utils import atomic_write_text, get_agents_dir, get_cache_dir, get_decisions_dir, is_agd_filename, load_config
+
+FINGERPRINT_VERSION = 1
+FINGERPRINT_FILE = 'fingerprint.json'
+ERRORS_FILE = '{slot}-errors.json'  # Kept apart so the fast path never loads error lists
+_DIGEST_CHUNK_LINES = 4096
+
+
+def _stat_line(path: Path) -> str:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return f"{path.name}:-\n"
+    return f"{path.name}:{st.st_mtime_ns}:{st.st_size}\n"
+
+
+def corpus_fingerprint(project_dir: Path, entries: dict[str, list[int] | None] | None = None) -> str:
+    """Digest the on-disk state of the decisions and config.json.
+
+    Only directory entries are stat'ed; no AGD file is opened. Returns ''
+    if the decisions directory cannot be listed. Pass the result of
+    stat_decisions() as entries to reuse a listing already made.
+    """
+    with STATS.phase('fingerprint'):
+        if entries is None:
+            entries = _stat_decisions(project_dir)
+        if entries is None:
+            return ''
+        return _corpus_fingerprint(project_dir, entries)
+
+
+def stat_decisions(project_dir: Path) -> dict[str, list[int] | None] | None:
+    """AGD file name -> [mtime_ns, size] (None if the stat failed), or None
+    if the decisions directory cannot be listed."""
+    with STATS.phase('fingerprint'):
+        return _stat_decisions(project_dir)
+
+
+def _stat_decisions(project_dir: Path) -> dict[str, list[int] | None] | None:
+    if STATS.enabled:
+        STATS.count('dir_scans')
+    # Stat while listing: keeping every DirEntry until after sorting would
+    # cost far more memory than the results
+    stats = {}
+    try:
+        with os.scandir(get_decisions_dir(project_dir)) as it:
+            for entry in it:
+                if not is_agd_filename(entry.name):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    stats[entry.name] = None
+                    continue
+                stats[entry.name] = [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+    return {name: stats[name] for name in sorted(stats)}
+
+
+def _corpus_fingerprint(project_dir: Path, entries: dict[str, list[int] | None]) -> str:
+    try:
+        dir_stat = os.stat(get_decisions_dir(project_dir))
+    except OSError:
+        return ''
+
+    # Digest of the lines joined by newlines, fed in chunks
+    digest = hashlib.blake2b(digest_size=16)
+    chunk = [f"{dir_stat.st_mtime_ns}:{len(entries)}"]
+    for name, st in entries.items():
+        chunk.append(f"{name}:{st[0]}:{st[1]}" if st else f"{name}:-")
+        if len(chunk) >= _DIGEST_CHUNK_LINES:
+            digest.update('\n'.join(chunk).encode())
+            chunk = ['']  # Leading newline before the next line
+    if len(chunk) > 1 or chunk[0]:
+        digest.update('\n'.join(chunk).encode())
+
+    digest.update(_stat_line(get_agents_dir(project_dir) / 'config.json').encode())
+    return f"{dir_stat.st_mtime_ns}-{digest.hexdigest()}"
+
+
+def decisions_mtime(project_dir: Path) -> str:
+    """The decisions directory mtime that prefixes corpus_fingerprint(), or ''."""
+    try:
+        return str(os.stat(get_decisions_dir(project_dir)).st_mtime_ns)
+    except OSError:
+        return ''
+
+
+def with_code_refs(project_dir: Path, fingerprint: str) -> tuple[str, dict[str, list[list]] | None]:
+    """fingerprint extended with a digest of the AGD citations in source code
+    when codeReferences is enabled in config.json; they are not covered
+    otherwise, so an edited source file would look like an unchanged corpus.
+
+    Source files are scanned for this (see scan_code_refs() in
+    code_refs.py); the citations are returned too, so the caller can reuse
+    the scan. Returns (fingerprint, None) when disabled.
+    """
+    config = load_config(get_agents_dir(project_dir) / 'config.json') or {}
+    if not fingerprint or not config.get('codeReferences'):
+        return fingerprint, None
+    from code_refs import scan_code_refs
+    refs = scan_code_refs(project_dir, config)
+    digest = hashlib.blake2b(json.dumps(refs, sort_keys=True, separators=(',', ':')).encode(), digest_size=16)
+    return f"{fingerprint}+{digest.hexdigest()}", refs
+
+
+def with_code_refs_state(project_dir: Path, fingerprint: str, index_stat: str | None = None) -> str:
+    """fingerprint extended, when codeReferences is enabled, with
+    code_refs_state() (see code_refs.py) instead of a scan: the hook's
+    stand-in for with_code_refs(), which lists and reads no source file.
+    """
+    config = load_config(get_agents_dir(project_dir) / 'config.json') or {}
+    if not fingerprint or not config.get('codeReferences'):
+        return fingerprint
+    from code_refs import code_refs_state
+    return f"{fingerprint}+{code_refs_state(project_dir, index_stat)}"
+
+
+def files_fingerprint(project_dir: Path, names: tuple[str, ...]) -> str:
+    """Digest the stat of files under .agents/ (e.g. generated indexes)."""
+    agents_dir = get_agents_dir(project_dir)
+    digest = hashlib.blake2b(digest_size=16)
+    for name in names:
+        digest.update(_stat_line(agents_dir / name).encode())
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    """Fingerprints recorded after the last successful run, one per consumer,
+    and the errors of the last failed one."""
+
+    def __init__(self, project_dir: Path):
+        self.path = get_cache_dir(project_dir) / FINGERPRINT_FILE
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != FINGERPRINT_VERSION:
+            return {}
+        return data
+
+    def matches(self, slot: str, fingerprint: str) -> bool:
+        """Whether fingerprint equals the one stored for slot."""
+        return bool(fingerprint) and self._load().get(slot) == fingerprint
+
+    def store(self, slot: str, fingerprint: str) -> None:
+        """Record fingerprint for slot (after a successful run)."""
+        if not fingerprint:
+            return
+        data = self._load()
+        data['version'] = FINGERPRINT_VERSION
+        data[slot] = fingerprint
+        try:
+            atomic_write_text(self.path, json.dumps(data))
+        except OSError:
+            pass
+
+    def store_errors(self, slot: str, fingerprint: str, errors: list[dict]) -> None:
+        """Record the errors (AgdError.to_dict()) a run of slot found at fingerprint."""
+        if not fingerprint:
+            return
+        try:
+            atomic_write_text(self.path.with_name(ERRORS_FILE.format(slot=slot)),
+                              json.dumps({'fingerprint': fingerprint, 'errors': errors}))
+        except OSError:
+            pass
+
+    def stored_errors(self, slot: str, fingerprint: str) -> list[dict] | None:
+        """Errors recorded by store_errors() at fingerprint, or None if none match."""
+        if not fingerprint:
+            return None
+        try:
+            with open(self.path.with_name(ERRORS_FILE.format(slot=slot))) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('fingerprint') != fingerprint:
+            return None
+        errors = data.get('errors')
+        return errors if isinstance(errors, list) else None
@@ -8,107 +8,150 @@ To disable auto-update, add this filename to disableAutoUpdateScripts in config.
 Usage:
     generate-index.py                    # Auto-detect from CLAUDE_PROJECT_DIR
     generate-index.py <project_dir>      # Manual override
+    generate-index.py --full             # Rebuild from scratch instead of patching
+    generate-index.py --verify           # Check incremental output equals a full rebuild
+    generate-index.py --since <rev>      # Patch only lines of AGDs changed since a git revision
+    generate-index.py --workspace [root] [--jobs N]  # Every .agents tree under root (monorepo)
+    generate-index.py --format jsonl     # One JSON object per AGD on stdout; no files written
 
 Generates:
     - INDEX-TAGS.md: Files with their tags
     - INDEX-AGD-RELATIONS.md: AGD obsoletes/updates relationships
-"""
+    - INDEX-AGD-STATUS.md: Effective status of each AGD
+    - INDEX-SUMMARY.md: Status, title, description and tags of each AGD (optionally size-limited)
+    - INDEX-CODE-REFS.md: Source files citing each AGD (optional, see code_refs.py)
 
-import sys
-from pathlib import Path
+--since expects the index files to be current as of <rev> (e.g. checked by
+CI there); if one is missing, everything is regenerated.
 
-from utils import (
-    AGD_PATTERN,
-    DECISIONS_DIR,
-    RELATION_FIELDS,
-    find_agd_file,
-    get_agd_sort_key,
-    get_agents_dir,
-    get_decisions_dir,
-    get_project_dir,
-    parse_frontmatter,
-)
+--workspace indexes each project found under root like a plain run (with
+--full, from scratch) and prefixes its line with the project's path (see
+workspace.py).
 
+--format jsonl streams one line per AGD, in AGD order, for tools and agents:
+    {"id":"AGD-002","path":"decisions/AGD-002_x.md","title":"...","description":"...",
+     "tags":["api"],"status":"active","relations":{"obsoletes":["AGD-001"]}}
+Unreadable AGDs get {"id", "path", "error"} instead.
+"""
 
-def collect_agd_data(decisions_dir: Path) -> tuple[list, list]:
-    """Collect tags and relations data from all AGD files."""
-    tags_data = []       # [(relative_path, [tags])]
-    relations_data = []  # [(source_path, target_path, relation_type)]
+from stats import run_main  # First, so that --stats can time the other imports
+
+import sys
+from pathlib import Path
 
-    for agd_file in sorted(decisions_dir.glob(AGD_PATTERN), key=lambda f: get_agd_sort_key(f.name)):
-        try:
-            content = agd_file.read_text()
-        except IOError:
-            continue
+from corpus import load_corpus
+from fingerprint import FingerprintStore, corpus_fingerprint, files_fingerprint
+from indexes import compare_indexes, export_jsonl, generate_indexes, update_indexes_since
+from utils import INDEX_FILES, get_project_dir, pop_option
 
-        frontmatter = parse_frontmatter(content)
-        relative_path = f"{DECISIONS_DIR}/{agd_file.name}"
+FORMATS = ('markdown', 'jsonl')
 
-        # Collect tags
-        if 'tags' in frontmatter and frontmatter['tags']:
-            tags = [f"#{t.strip()}" for t in frontmatter['tags'].split(',') if t.strip()]
-            if tags:
-                tags_data.append((relative_path, tags))
 
-        # Collect relationships
-        for field, rel_type in RELATION_FIELDS:
-            if field in frontmatter and frontmatter[field]:
-                refs = [r.strip() for r in frontmatter[field].split(',') if r.strip()]
-                for ref in refs:
-                    target_file = find_agd_file(decisions_dir, ref)
-                    if target_file:
-                        target_path = f"{DECISIONS_DIR}/{target_file.name}"
-                        relations_data.append((relative_path, target_path, rel_type))
+def verify_indexes(project_dir: Path) -> int:
+    """Render indexes incrementally and from scratch; exit code 1 if they differ."""
+    mismatched = compare_indexes(load_corpus(project_dir))
+    for name in mismatched:
+        print(f"✗ {name}: incremental output differs from full rebuild", file=sys.stderr)
+    if not mismatched:
+        print("✓ Incremental and full index output are identical")
+    return 1 if mismatched else 0
 
-    return tags_data, relations_data
 
+def update_since(project_dir: Path, rev: str) -> int:
+    """Patch the indexes for AGDs changed since rev. Returns the exit code."""
+    from git_changes import GitError, load_changes
 
-def write_tags_index(agents_dir: Path, tags_data: list) -> None:
-    """Write INDEX-TAGS.md file."""
-    content = "# Tags Index\n\n"
-    content += "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
-    content += "<!-- Search with: grep \"#tagname\" INDEX-TAGS.md -->\n\n"
+    try:
+        changes = load_changes(project_dir, rev)
+    except GitError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
 
-    for path, tags in sorted(tags_data, key=lambda x: get_agd_sort_key(x[0])):
-        content += f"{path}: {', '.join(tags)}\n"
+    def update():
+        counts = update_indexes_since(changes) if changes.corpus.exists else (0, 0)
+        return counts if counts is not None else generate_indexes(load_corpus(project_dir), full=True)
 
-    (agents_dir / 'INDEX-TAGS.md').write_text(content)
+    from locking import run_locked
+    counts = run_locked(project_dir, update)
+    print(f"✓ Index updated: {counts[0]} files tagged, {counts[1]} relations "
+          f"({len(changes.changed) + len(changes.removed)} AGDs changed since {rev})")
+    return 0
 
 
-def write_relations_index(agents_dir: Path, relations_data: list) -> None:
-    """Write INDEX-AGD-RELATIONS.md file."""
-    content = "# AGD Relations Index\n\n"
-    content += "<!-- AUTO-GENERATED - DO NOT EDIT -->\n"
-    content += "<!-- -(o)-> : obsoletes, -(u)-> : updates -->\n"
-    content += "<!-- Search with: grep \"AGD-001\" INDEX-AGD-RELATIONS.md -->\n\n"
+def index_project(project_dir: Path, full: bool = False) -> tuple[int, int] | None:
+    """Regenerate the indexes; returns (tags, relations), or None if up to date."""
+    # Skip regeneration if neither the corpus nor the indexes changed
+    store = FingerprintStore(project_dir)
+    fingerprint = corpus_fingerprint(project_dir)
+    if not full and store.matches('index', f"{fingerprint}+{files_fingerprint(project_dir, INDEX_FILES)}"):
+        # Source files are not part of the fingerprint
+        from code_refs import update_code_refs_index
+        update_code_refs_index(project_dir)
+        return None
 
-    for source, target, rel_type in sorted(relations_data, key=lambda x: get_agd_sort_key(x[0])):
-        content += f"{source} -({rel_type})-> {target}\n"
+    corpus = load_corpus(project_dir, fingerprint=fingerprint)
+    # Hooks and the daemon may be writing the same files
+    from locking import run_locked
+    counts = run_locked(project_dir, lambda: generate_indexes(corpus, full=full))
+    store.store('index', f"{fingerprint}+{files_fingerprint(project_dir, INDEX_FILES)}")
+    return counts
 
-    (agents_dir / 'INDEX-AGD-RELATIONS.md').write_text(content)
 
+def index_message(counts: tuple[int, int] | None) -> str:
+    if counts is None:
+        return "Index up to date"
+    return f"Index updated: {counts[0]} files tagged, {counts[1]} relations"
 
-def generate_indexes(project_dir: Path) -> tuple[int, int]:
-    """Generate all index files. Returns (tags_count, relations_count)."""
-    agents_dir = get_agents_dir(project_dir)
-    decisions_dir = get_decisions_dir(project_dir)
 
-    if not decisions_dir.exists():
-        return 0, 0
+def index_workspace(root: Path, full: bool, jobs: int) -> int:
+    """Index every project under root. Returns the exit code."""
+    from workspace import find_projects, run_projects
 
-    tags_data, relations_data = collect_agd_data(decisions_dir)
-    write_tags_index(agents_dir, tags_data)
-    write_relations_index(agents_dir, relations_data)
+    projects = find_projects(root)
+    if not projects:
+        print(f"Error: no .agents/config.json found under {root}", file=sys.stderr)
+        return 1
 
-    return len(tags_data), len(relations_data)
+    results = run_projects(lambda project: index_project(project.path, full), projects, jobs)
+    for project, counts in zip(projects, results):
+        print(f"✓ {project.label}: {index_message(counts)}")
+    return 0
 
 
 def main():
-    project_dir = get_project_dir()
-    tags_count, relations_count = generate_indexes(project_dir)
-    print(f"✓ Index updated: {tags_count} files tagged, {relations_count} relations")
+    args = sys.argv[1:]
+    since = pop_option(args, '--since')
+    output = pop_option(args, '--format') or 'markdown'
+    flags = {a for a in args if a.startswith('-')}
+
+    if output not in FORMATS:
+        print(f"Error: --format must be one of {', '.join(FORMATS)}", file=sys.stderr)
+        sys.exit(1)
+    if output == 'jsonl':
+        if since is not None or '--workspace' in flags:
+            print("Error: --format jsonl cannot be combined with --since or --workspace", file=sys.stderr)
+            sys.exit(1)
+        export_jsonl(load_corpus(get_project_dir(args)), sys.stdout)
+        sys.exit(0)
+
+    if '--workspace' in flags:
+        if since is not None:
+            print("Error: --since cannot be combined with --workspace", file=sys.stderr)
+            sys.exit(1)
+        from workspace import pop_jobs
+        jobs = pop_jobs(args)
+        sys.exit(index_workspace(get_project_dir(args), '--full' in flags, jobs))
+
+    project_dir = get_project_dir(args)
+    if since is not None:
+        sys.exit(update_since(project_dir, since))
+
+    if '--verify' in flags:
+        sys.exit(verify_indexes(project_dir))
+
+    print(f"✓ {index_message(index_project(project_dir, full='--full' in flags))}")
     sys.exit(0)
 
 
 if __name__ == '__main__':
-    main()
+    run_main('generate-index', main)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Prebuilt lookup structures for querying AGDs by tag and relation.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Stored in .agents/.cache/query.json by generate_indexes():
+    - tags: inverted index tag -> [AGD file names]
+    - out:  adjacency list  name -> [[rel_type, target name]]   (this AGD obsoletes/updates target)
+    - in:   reverse edges   name -> [[rel_type, source name]]   (source obsoletes/updates this AGD)
+
+Edges are those of the relation graph (graph.py), declared on either side.
+
+Lookups are exact (no substring matching): tag `a/b` never matches `a/bc`
+and `AGD-001` never matches `AGD-0010`.
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+
+from corpus import Corpus
+from fingerprint import decisions_mtime
+from utils import DECISIONS_DIR, AtomicWriter, get_agd_id, get_agd_sort_key, get_cache_dir
+
+QUERY_VERSION = 1
+QUERY_FILE = 'query.json'
+
+
+class QueryIndex:
+    """Inverted tag index and relation adjacency lists over AGD file names."""
+
+    def __init__(self, data: dict):
+        self.ids: dict[str, str] = data['ids']
+        self.tags: dict[str, list[str]] = data['tags']
+        self.out_edges: dict[str, list[list[str]]] = data['out']
+        self.in_edges: dict[str, list[list[str]]] = data['in']
+
+    @classmethod
+    def build(cls, corpus: Corpus) -> 'QueryIndex':
+        data = {'ids': {}, 'tags': {}, 'out': {}, 'in': {}}
+        for agd_id, path in corpus.resolver.by_id.items():
+            data['ids'][agd_id] = path.name
+
+        for record in corpus.records:
+            if record.error:
+                continue
+            tags_str = record.frontmatter.get('tags', '')
+            for tag in dict.fromkeys(t.strip() for t in tags_str.split(',') if t.strip()):
+                data['tags'].setdefault(tag, []).append(record.name)
+
+        # Edges come from the relation graph, so a relation declared on either
+        # side (obsoletes or obsoleted_by) is found as in INDEX-AGD-STATUS.md
+        graph = corpus.graph
+        edges = sorted(graph.forward | graph.reverse,
+                       key=lambda e: (get_agd_sort_key(e[0]), e[0], e[1], get_agd_sort_key(e[2]), e[2]))
+        for source, rel_type, target in edges:
+            data['out'].setdefault(source, []).append([rel_type, target])
+            data['in'].setdefault(target, []).append([rel_type, source])
+        return cls(data)
+
+    def to_dict(self) -> dict:
+        return {'ids': self.ids, 'tags': self.tags, 'out': self.out_edges, 'in': self.in_edges}
+
+    def resolve(self, agd_ref: str) -> str | None:
+        """File name for an AGD reference such as `AGD-001`."""
+        agd_id = get_agd_id(agd_ref)
+        return self.ids.get(agd_id) if agd_id else None
+
+    def by_tags(self, tags: list[str], match_any: bool = False) -> list[str]:
+        """AGD file names having all (or, with match_any, any) of tags."""
+        postings = [self.tags.get(tag, []) for tag in tags]
+        if not postings:
+            return []
+        if match_any:
+            names = set().union(*postings)
+        else:
+            postings.sort(key=len)
+            names = set(postings[0]).intersection(*postings[1:])
+        return sorted(names, key=lambda n: (get_agd_sort_key(n), n))
+
+    def edges(self, name: str, incoming: bool, types: str | None = None) -> list[tuple[str, str]]:
+        """Direct (rel_type, other name) edges of an AGD."""
+        adjacency = self.in_edges if incoming else self.out_edges
+        return [(t, other) for t, other in adjacency.get(name, []) if not types or t in types]
+
+    def traverse(self, name: str, incoming: bool, types: str | None = None,
+                 recursive: bool = False) -> list[tuple[str, str, str]]:
+        """Edges reachable from name, breadth-first.
+
+        Returns (source, rel_type, target) triples in the direction of the
+        relation (source obsoletes/updates target). Each AGD is expanded once,
+        so cycles terminate.
+        """
+        result = []
+        seen = {name}
+        queue = deque([name])
+        while queue:
+            current = queue.popleft()
+            for rel_type, other in self.edges(current, incoming, types):
+                result.append((other, rel_type, current) if incoming else (current, rel_type, other))
+                if recursive and other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+        return result
+
+
+def relative_path(name: str) -> str:
+    """Path relative to .agents/, as used in index files."""
+    return f"{DECISIONS_DIR}/{name}"
+
+
+def save_query_index(corpus: Corpus, query_index: QueryIndex | None = None) -> None:
+    """Persist the query index together with the corpus fingerprint it reflects
+    (taken before the corpus was loaded, see load_corpus())."""
+    query_index = query_index or QueryIndex.build(corpus)
+    try:
+        with AtomicWriter(get_cache_dir(corpus.project_dir) / QUERY_FILE) as f:
+            f.write_json({
+                'version': QUERY_VERSION,
+                'fingerprint': corpus.fingerprint,
+                **query_index.to_dict(),
+            }, depth=2)
+    except OSError:
+        pass
+
+
+def load_query_index(project_dir: Path) -> QueryIndex:
+    """Load the prebuilt query index, rebuilding it if missing or stale.
+
+    Freshness is judged by the decisions directory mtime alone (the prefix
+    of the stored fingerprint), so a lookup stats one directory rather than
+    every AGD. That catches added, removed and renamed files; an AGD edited
+    in place is picked up when the hook or generate-index.py next rewrites
+    the index.
+    """
+    try:
+        with open(get_cache_dir(project_dir) / QUERY_FILE) as f:
+            data = json.load(f)
+        mtime = decisions_mtime(project_dir)
+        if (mtime and data.get('version') == QUERY_VERSION
+                and str(data.get('fingerprint', '')).startswith(f"{mtime}-")):
+            return QueryIndex(data)
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    from corpus import load_corpus
+    corpus = load_corpus(project_dir)
+    query_index = QueryIndex.build(corpus)
+    save_query_index(corpus, query_index)
+    return query_index
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Optional SQLite sidecar index with FTS5 full-text search over AGDs.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Enabled with `"sqliteIndex": true` in config.json. Maintains .agents/index.sqlite:
+    - agds:      one row per AGD file (id, title, description, mtime/size)
+    - tags:      (name, tag)
+    - relations: (source name, rel_type, target AGD id)
+    - agd_fts:   FTS5 table over title, description and body
+
+Only files whose mtime or size changed since the last run are re-read, and
+each run is applied in a single transaction. Uses only the stdlib sqlite3.
+"""
+
+import sqlite3
+from pathlib import Path
+
+from corpus import Corpus
+from utils import RELATION_FIELDS, get_agd_id, get_agents_dir
+
+SQLITE_FILE = 'index.sqlite'
+SCHEMA_VERSION = '1'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS agds (
+    name TEXT PRIMARY KEY,
+    agd_id TEXT,
+    title TEXT,
+    description TEXT,
+    mtime_ns INTEGER,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS agds_id ON agds (agd_id);
+CREATE TABLE IF NOT EXISTS tags (name TEXT, tag TEXT);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag);
+CREATE INDEX IF NOT EXISTS tags_name ON tags (name);
+CREATE TABLE IF NOT EXISTS relations (source TEXT, rel_type TEXT, target_id TEXT);
+CREATE INDEX IF NOT EXISTS relations_source ON relations (source);
+CREATE INDEX IF NOT EXISTS relations_target ON relations (target_id);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS agd_fts USING fts5 (name UNINDEXED, title, description, body);
+"""
+
+
+def get_sqlite_path(project_dir: Path) -> Path:
+    return get_agents_dir(project_dir) / SQLITE_FILE
+
+
+def _read_body(path: Path) -> str:
+    """Markdown body after the frontmatter."""
+    content = path.read_text(errors='replace')
+    if content.startswith('---'):
+        parts = content.split('---', 2)
+        if len(parts) == 3:
+            return parts[2]
+    return content
+
+
+def _open(db_path: Path) -> tuple[sqlite3.Connection, bool]:
+    """Open (and if needed create or reset) the database. Returns (conn, has_fts)."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+    except sqlite3.DatabaseError:
+        version = None
+    if version is None or version[0] != SCHEMA_VERSION:
+        conn.close()
+        db_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+
+    try:
+        conn.executescript(FTS_SCHEMA)
+        has_fts = True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: keep the structured tables only
+        has_fts = False
+    return conn, has_fts
+
+
+def update_sqlite_index(corpus: Corpus) -> int:
+    """Bring index.sqlite in line with the corpus. Returns the number of AGDs rewritten."""
+    conn, has_fts = _open(get_sqlite_path(corpus.project_dir))
+    try:
+        stored = {name: (mtime_ns, size) for name, mtime_ns, size in
+                  conn.execute("SELECT name, mtime_ns, size FROM agds")}
+        current = {record.name: record for record in corpus.records if not record.error}
+
+        removed = [name for name in stored if name not in current]
+        changed = [record for name, record in current.items()
+                   if stored.get(name) != (record.signature[0], record.signature[1])]
+        if not removed and not changed:
+            return 0
+
+        conn.execute("BEGIN")
+        for name in removed + [record.name for record in changed]:
+            conn.execute("DELETE FROM agds WHERE name = ?", (name,))
+            conn.execute("DELETE FROM tags WHERE name = ?", (name,))
+            conn.execute("DELETE FROM relations WHERE source = ?", (name,))
+            if has_fts:
+                conn.execute("DELETE FROM agd_fts WHERE name = ?", (name,))
+
+        for record in changed:
+            fm = record.frontmatter
+            title = fm.get('title', '')
+            description = fm.get('description', '')
+            conn.execute("INSERT INTO agds VALUES (?, ?, ?, ?, ?, ?)",
+                         (record.name, record.agd_id, title, description,
+                          record.signature[0], record.signature[1]))
+            tags = dict.fromkeys(t.strip() for t in fm.get('tags', '').split(',') if t.strip())
+            conn.executemany("INSERT INTO tags VALUES (?, ?)", [(record.name, tag) for tag in tags])
+            for field, rel_type in RELATION_FIELDS:
+                refs = (r.strip() for r in fm.get(field, '').split(','))
+                conn.executemany("INSERT INTO relations VALUES (?, ?, ?)",
+                                 [(record.name, rel_type, get_agd_id(ref)) for ref in refs if get_agd_id(ref)])
+            if has_fts:
+                try:
+                    body = _read_body(record.path)
+                except OSError:
+                    body = ''
+                conn.execute("INSERT INTO agd_fts VALUES (?, ?, ?, ?)", (record.name, title, description, body))
+        conn.execute("COMMIT")
+        return len(changed)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _quote_terms(query: str) -> str:
+    """Turn free text into an FTS5 query that matches all words literally."""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search(project_dir: Path, query: str, limit: int = 10) -> list[tuple[str, str, str]]:
+    """Full-text search. Returns (name, title, snippet) ranked by bm25.
+
+    Raises FileNotFoundError if the index does not exist and RuntimeError if
+    this SQLite build has no FTS5.
+    """
+    db_path = get_sqlite_path(project_dir)
+    if not db_path.exists():
+        raise FileNotFoundError(db_path)
+
+    sql = ("SELECT name, title, snippet(agd_fts, 3, '[', ']', '…', 12) FROM agd_fts "
+           "WHERE agd_fts MATCH ? ORDER BY bm25(agd_fts, 0, 10.0, 5.0, 1.0) LIMIT ?")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        try:
+            return conn.execute(sql, (query, limit)).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'no such table' in str(e):
+                raise RuntimeError("SQLite was built without FTS5") from e
+            # Not valid FTS5 syntax: search the words literally
+            return conn.execute(sql, (_quote_terms(query), limit)).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Opt-in phase timings and I/O counters for the hook scripts.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+
+Enable with `--stats` on validate-agds.py, generate-index.py or
+`agent-centric.py hook`, or with the AGENT_CENTRIC_STATS environment variable:
+
+    AGENT_CENTRIC_STATS=1      # one JSON line on stderr per run
+    AGENT_CENTRIC_STATS=log    # append it to .agents/.cache/stats.jsonl instead
+
+Empty, `0`, `false`, `no` and `off` (any case) leave stats disabled.
+
+A line looks like:
+
+    {"script": "validate-agds", "exit": 0, "total_ms": 41.2,
+     "phases": {"interpreter": 20.0, "imports": 6.1, "scan": 1.3, "read": 9.8, ...},
+     "counters": {"dir_scans": 2, "files_parsed": 412, "bytes_read": 201933, ...}}
+
+Phases (milliseconds, accumulated over the run; some nest inside others):
+interpreter (process start until this module was imported, Linux only),
+imports, fingerprint, scan (decisions directory listing), cache (parse cache
+load/save), read, parse (frontmatter), validate (tag checks and reference
+resolution), render (index content), write (index, state and query files).
+
+When disabled, instrumented code pays one attribute check per call site.
+Counters updated from loader threads may undercount slightly.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+STATS_ENV = 'AGENT_CENTRIC_STATS'
+STATS_FLAG = '--stats'
+STATS_LOG = 'stats.jsonl'
+MAX_LOG_BYTES = 1024 * 1024  # Rotated to stats.jsonl.1 beyond this
+STATS_OFF_VALUES = ('', '0', 'false', 'no', 'off')
+
+_IMPORTED_AT = time.perf_counter()
+
+
+def _process_age() -> float | None:
+    """Seconds since this process started, from /proc (None elsewhere)."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _NullPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_DISABLED = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats: 'Stats', name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+
+
+class Stats:
+    """Phase timers and counters for one process."""
+
+    def __init__(self):
+        self.enabled = False
+        self.output = 'stderr'
+        self.started = _IMPORTED_AT
+        self.phases: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.project_dir: Path | None = None  # Set by get_project_dir() in utils.py
+
+    def enable(self, output: str = 'stderr') -> None:
+        self.enabled = True
+        self.output = output
+        now = time.perf_counter()
+        age = _process_age()
+        if age is not None:
+            self.phases['interpreter'] = max(0.0, age - (now - _IMPORTED_AT))
+        self.phases['imports'] = now - _IMPORTED_AT
+
+    def phase(self, name: str):
+        """Context manager adding its duration to phase name."""
+        return _Phase(self, name) if self.enabled else _DISABLED
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, script: str, exit_code: int) -> dict:
+        total = time.perf_counter() - self.started + self.phases.get('interpreter', 0.0)
+        return {
+            'script': script,
+            'exit': exit_code,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'pid': os.getpid(),
+            'total_ms': round(total * 1000, 3),
+            'phases': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'counters': self.counters,
+        }
+
+    def emit(self, script: str, exit_code: int) -> None:
+        """Write the run's JSON line to stderr or the rolling log."""
+        line = json.dumps(self.record(script, exit_code), separators=(',', ':')) + '\n'
+        log_path = _log_path() if self.output == 'log' else None
+        if log_path is None:
+            sys.stderr.write(line)
+            return
+        try:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            if log_path.exists() and log_path.stat().st_size > MAX_LOG_BYTES:
+                os.replace(log_path, log_path.with_name(STATS_LOG + '.1'))
+            with open(log_path, 'a') as f:
+                f.write(line)
+        except OSError:
+            pass
+
+
+def _log_path() -> Path | None:
+    """The rolling log of the project the script ran on: the directory
+    get_project_dir() resolved, else CLAUDE_PROJECT_DIR."""
+    from utils import get_cache_dir
+
+    project_dir = STATS.project_dir or os.environ.get('CLAUDE_PROJECT_DIR')
+    return get_cache_dir(Path(project_dir)) / STATS_LOG if project_dir else None
+
+
+STATS = Stats()
+
+
+def run_main(script: str, main) -> None:
+    """Run a script's main(), emitting stats afterwards if enabled.
+
+    The exit code (and any SystemExit) is passed through unchanged.
+    """
+    mode = os.environ.get(STATS_ENV, '').strip().lower()
+    if mode in STATS_OFF_VALUES:
+        mode = ''
+    if mode or STATS_FLAG in sys.argv[1:]:
+        STATS.enable('log' if mode == 'log' else 'stderr')
+    if STATS_FLAG in sys.argv[1:]:
+        sys.argv.remove(STATS_FLAG)
+
+    exit_code = 0
+    try:
+        main()
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    except BaseException:
+        exit_code = 1
+        raise
+    finally:
+        if STATS.enabled:
+            STATS.emit(script, exit_code)
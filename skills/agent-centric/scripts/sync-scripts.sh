@@ -4,107 +4,217 @@
 #
 # Usage:
 #     CLAUDE_PROJECT_DIR="..." CLAUDE_SKILL_DIR="..." bash sync-scripts.sh
+#     CLAUDE_SKILL_DIR="..." bash sync-scripts.sh --build-manifest
 #
 # This script should be run from the skill directory, not copied to project.
 #
+# The skill ships MANIFEST.sha256 (hashes of scripts/*.py and templates/*).
+# The manifest of the last sync is recorded in .agents/scripts/.sync-manifest.
+# When both are identical, config.json is older than the record and every
+# synced script still exists, nothing else is read and no process is spawned.
+# Otherwise config.json is read once and only entries whose hash changed are
+# copied. Run with --build-manifest after changing
+# scripts or templates; if the manifest is older than any of them, hashes
+# are computed on the fly instead.
+#
 
 # Require environment variables
-if [ -z "$CLAUDE_PROJECT_DIR" ]; then
-    echo "Error: CLAUDE_PROJECT_DIR not set" >&2
-    exit 1
-fi
 if [ -z "$CLAUDE_SKILL_DIR" ]; then
     echo "Error: CLAUDE_SKILL_DIR not set" >&2
     exit 1
 fi
+if [ -z "$CLAUDE_PROJECT_DIR" ] && [ "$1" != "--build-manifest" ]; then
+    echo "Error: CLAUDE_PROJECT_DIR not set" >&2
+    exit 1
+fi
 
 PROJECT_DIR="$CLAUDE_PROJECT_DIR"
 SKILL_DIR="$CLAUDE_SKILL_DIR"
 AGENTS_DIR="$PROJECT_DIR/.agents"
 CONFIG_FILE="$AGENTS_DIR/config.json"
-
-# Compute MD5 hash (works on both macOS and Linux)
-compute_md5() {
-    md5 -q "$1" 2>/dev/null || md5sum "$1" | cut -d' ' -f1
-}
+SKILL_MANIFEST="$SKILL_DIR/MANIFEST.sha256"
+RECORDED_MANIFEST="$AGENTS_DIR/scripts/.sync-manifest"
+NL=$'\n'
 
 # Compute MD5 hash of stdin content
 compute_md5_stdin() {
     md5 2>/dev/null || md5sum | cut -d' ' -f1
 }
 
+# Print "<sha256>  <path>" lines for all managed files, relative to SKILL_DIR
+build_manifest() {
+    (
+        cd "$SKILL_DIR" || exit 1
+        FILES=()
+        for FILE in scripts/*.py templates/*; do
+            [ -f "$FILE" ] && FILES+=("$FILE")
+        done
+        [ ${#FILES[@]} -gt 0 ] || exit 0
+        sha256sum "${FILES[@]}" 2>/dev/null || shasum -a 256 "${FILES[@]}"
+    )
+}
+
+if [ "$1" = "--build-manifest" ]; then
+    build_manifest > "$SKILL_MANIFEST"
+    exit 0
+fi
+
 [ -d "$AGENTS_DIR" ] || exit 0
 [ -d "$SKILL_DIR" ] || exit 0
 
-# Check if all updates disabled
-if [ -f "$CONFIG_FILE" ]; then
-    DISABLE=$(python3 -c "import json; c=json.load(open('$CONFIG_FILE')); print('true' if c.get('disableAutoUpdateScripts') is True else 'false')" 2>/dev/null || echo "false")
-    [ "$DISABLE" = "true" ] && exit 0
+# Use the shipped manifest unless a managed file is newer than it
+MANIFEST=""
+if [ -f "$SKILL_MANIFEST" ]; then
+    MANIFEST=$(<"$SKILL_MANIFEST")
+    for FILE in "$SKILL_DIR/scripts/"*.py "$SKILL_DIR/templates/"*; do
+        if [ -f "$FILE" ] && [ "$FILE" -nt "$SKILL_MANIFEST" ]; then
+            MANIFEST=""
+            break
+        fi
+    done
+fi
+[ -n "$MANIFEST" ] || MANIFEST=$(build_manifest)
+
+# Recorded manifest: synced lines, plus "disabled  <path>" for scripts that
+# were skipped because of disableAutoUpdateScripts
+RECORDED=""
+RECORDED_SYNCED=""
+RECORDED_DISABLED=""
+if [ -f "$RECORDED_MANIFEST" ]; then
+    RECORDED=$(<"$RECORDED_MANIFEST")
+    while read -r HASH FILE; do
+        [ -n "$FILE" ] || continue
+        if [ "$HASH" = "disabled" ]; then
+            RECORDED_DISABLED="$RECORDED_DISABLED$FILE$NL"
+        else
+            RECORDED_SYNCED="$RECORDED_SYNCED$HASH  $FILE$NL"
+        fi
+    done <<< "$RECORDED"
 fi
 
-UPDATED=""
+was_disabled() {
+    case "$NL$RECORDED_DISABLED" in
+        *"$NL$1$NL"*) return 0 ;;
+    esac
+    return 1
+}
 
-for SCRIPT in "$SKILL_DIR/scripts/"*.py; do
-    [ -f "$SCRIPT" ] || continue
-    BASENAME=$(basename "$SCRIPT")
-    TARGET="$AGENTS_DIR/scripts/$BASENAME"
+# Target of a manifest path in the project
+target_path() {
+    case "$1" in
+        scripts/*) echo "$AGENTS_DIR/$1" ;;
+        templates/gitignore) echo "$AGENTS_DIR/.gitignore" ;;
+        templates/*) echo "$AGENTS_DIR/${1#templates/}" ;;
+    esac
+}
 
-    # Check if disabled
-    if [ -f "$CONFIG_FILE" ]; then
-        SKIP=$(python3 -c "import json; c=json.load(open('$CONFIG_FILE')); d=c.get('disableAutoUpdateScripts',[]); print('true' if isinstance(d,list) and '$BASENAME' in d else 'false')" 2>/dev/null || echo "false")
-        [ "$SKIP" = "true" ] && continue
-    fi
+# Fast path: neither the skill nor config.json changed since the last sync
+if [ "$MANIFEST$NL" = "$RECORDED_SYNCED" ] && ! [ "$CONFIG_FILE" -nt "$RECORDED_MANIFEST" ]; then
+    ALL_PRESENT=true
+    while read -r HASH FILE; do
+        case "$FILE" in
+            scripts/*)
+                was_disabled "$FILE" && continue
+                [ -f "$AGENTS_DIR/$FILE" ] || { ALL_PRESENT=false; break; }
+                ;;
+        esac
+    done <<< "$MANIFEST"
+    $ALL_PRESENT && exit 0
+fi
 
-    # If target doesn't exist, copy it (new script)
-    if [ ! -f "$TARGET" ]; then
-        cp "$SCRIPT" "$TARGET"
-        chmod +x "$TARGET"
-        UPDATED="$UPDATED $BASENAME(new)"
-        continue
-    fi
+# Read config.json once: "*" if all updates are disabled, else disabled names
+DISABLED=""
+if [ -f "$CONFIG_FILE" ]; then
+    DISABLED=$(python3 -c "
+import json, sys
+d = json.load(open(sys.argv[1])).get('disableAutoUpdateScripts', [])
+print('*' if d is True else '\n'.join(x for x in d if isinstance(x, str)) if isinstance(d, list) else '')
+" "$CONFIG_FILE" 2>/dev/null)
+fi
+[ "$DISABLED" = "*" ] && exit 0
 
-    # If target exists, check if it needs updating
-    if [ "$(compute_md5 "$SCRIPT")" != "$(compute_md5 "$TARGET")" ]; then
-        cp "$SCRIPT" "$TARGET"
-        chmod +x "$TARGET"
-        UPDATED="$UPDATED $BASENAME"
-    fi
-done
+is_disabled() {
+    case "$NL$DISABLED$NL" in
+        *"$NL$1$NL"*) return 0 ;;
+    esac
+    return 1
+}
 
-# Sync CLAUDE.md (preserve user content after marker)
-TEMPLATE="$SKILL_DIR/templates/CLAUDE.md"
-TARGET_MD="$AGENTS_DIR/CLAUDE.md"
-USER_MARKER="<!-- USER CONTENT BELOW"
-if [ -f "$TEMPLATE" ]; then
+sync_claude_md() {
+    local TEMPLATE="$1" TARGET_MD="$2"
+    local USER_MARKER="<!-- USER CONTENT BELOW"
     if [ ! -f "$TARGET_MD" ]; then
         # Create new file from template
         cp "$TEMPLATE" "$TARGET_MD"
         UPDATED="$UPDATED CLAUDE.md(new)"
-    else
-        # Update existing file, preserving user content
-        SRC_TEMPLATE=$(sed -n "1,/$USER_MARKER/p" "$TEMPLATE" | head -n -1)
-        TGT_TEMPLATE=$(sed -n "1,/$USER_MARKER/p" "$TARGET_MD" | head -n -1)
-
-        SRC_MD5=$(echo "$SRC_TEMPLATE" | compute_md5_stdin)
-        TGT_MD5=$(echo "$TGT_TEMPLATE" | compute_md5_stdin)
-
-        if [ "$SRC_MD5" != "$TGT_MD5" ]; then
-            USER_CONTENT=$(sed -n "/$USER_MARKER/,\$p" "$TARGET_MD" | tail -n +2)
-            cat "$TEMPLATE" > "$TARGET_MD"
-            [ -n "$USER_CONTENT" ] && echo "$USER_CONTENT" >> "$TARGET_MD"
-            UPDATED="$UPDATED CLAUDE.md"
-        fi
+        return
     fi
-fi
+
+    # Update existing file, preserving user content
+    local SRC_TEMPLATE TGT_TEMPLATE USER_CONTENT
+    SRC_TEMPLATE=$(sed -n "1,/$USER_MARKER/p" "$TEMPLATE" | head -n -1)
+    TGT_TEMPLATE=$(sed -n "1,/$USER_MARKER/p" "$TARGET_MD" | head -n -1)
+    if [ "$(echo "$SRC_TEMPLATE" | compute_md5_stdin)" != "$(echo "$TGT_TEMPLATE" | compute_md5_stdin)" ]; then
+        USER_CONTENT=$(sed -n "/$USER_MARKER/,\$p" "$TARGET_MD" | tail -n +2)
+        cat "$TEMPLATE" > "$TARGET_MD"
+        [ -n "$USER_CONTENT" ] && echo "$USER_CONTENT" >> "$TARGET_MD"
+        UPDATED="$UPDATED CLAUDE.md"
+    fi
+}
+
+UPDATED=""
+COMPILE=false
+NEW_RECORDED=""
+NEW_DISABLED=""
+mkdir -p "$AGENTS_DIR/scripts"
+
+while read -r HASH FILE; do
+    [ -n "$FILE" ] || continue
+    LINE="$HASH  $FILE"
+    SOURCE="$SKILL_DIR/$FILE"
+    TARGET=$(target_path "$FILE")
+    [ -n "$TARGET" ] || continue
+    NAME="${TARGET##*/}"
+    NEW_RECORDED="$NEW_RECORDED$LINE$NL"
+
+    if [ "$FILE" != "${FILE#scripts/}" ] && is_disabled "$NAME"; then
+        NEW_DISABLED="${NEW_DISABLED}disabled  $FILE$NL"
+        continue
+    fi
+
+    # Unchanged since the last sync and still present: nothing to do
+    case "$NL$RECORDED_SYNCED" in
+        *"$NL$LINE$NL"*) [ -f "$TARGET" ] && ! was_disabled "$FILE" && continue ;;
+    esac
+
+    case "$FILE" in
+        templates/CLAUDE.md)
+            sync_claude_md "$SOURCE" "$TARGET"
+            ;;
+        *)
+            if [ ! -f "$TARGET" ]; then
+                cp "$SOURCE" "$TARGET"
+                UPDATED="$UPDATED $NAME(new)"
+            elif ! cmp -s "$SOURCE" "$TARGET"; then
+                cp "$SOURCE" "$TARGET"
+                UPDATED="$UPDATED $NAME"
+            fi
+            case "$FILE" in
+                scripts/*) chmod +x "$TARGET"; COMPILE=true ;;
+            esac
+            ;;
+    esac
+done <<< "$MANIFEST"
 
 # Remove orphaned scripts (only those marked as auto-managed)
 for TARGET in "$AGENTS_DIR/scripts/"*.py; do
     [ -f "$TARGET" ] || continue
-    BASENAME=$(basename "$TARGET")
-    SOURCE="$SKILL_DIR/scripts/$BASENAME"
+    BASENAME="${TARGET##*/}"
 
     # Skip if source still exists
-    [ -f "$SOURCE" ] && continue
+    case "$NL$MANIFEST$NL" in
+        *"  scripts/$BASENAME$NL"*) continue ;;
+    esac
 
     # Only remove if file has the auto-managed marker
     if head -n 10 "$TARGET" | grep -q "Managed by: agent-centric skill"; then
@@ -113,20 +223,11 @@ for TARGET in "$AGENTS_DIR/scripts/"*.py; do
     fi
 done
 
-# Sync .gitignore
-GITIGNORE_SRC="$SKILL_DIR/templates/gitignore"
-GITIGNORE_TGT="$AGENTS_DIR/.gitignore"
-if [ -f "$GITIGNORE_SRC" ]; then
-    if [ ! -f "$GITIGNORE_TGT" ]; then
-        cp "$GITIGNORE_SRC" "$GITIGNORE_TGT"
-        UPDATED="$UPDATED .gitignore(new)"
-    else
-        if [ "$(compute_md5 "$GITIGNORE_SRC")" != "$(compute_md5 "$GITIGNORE_TGT")" ]; then
-            cp "$GITIGNORE_SRC" "$GITIGNORE_TGT"
-            UPDATED="$UPDATED .gitignore"
-        fi
-    fi
-fi
+# Precompile so the first hook run does not compile every module, and runs
+# with PYTHONDONTWRITEBYTECODE set never have to
+$COMPILE && python3 -m compileall -q "$AGENTS_DIR/scripts" >/dev/null 2>&1
+
+printf '%s' "$NEW_RECORDED$NEW_DISABLED" > "$RECORDED_MANIFEST"
 
 [ -n "$UPDATED" ] && echo "SYNC:$UPDATED"
 exit 0
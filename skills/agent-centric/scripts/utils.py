@@ -6,18 +6,44 @@ Managed by: agent-centric skill (auto-updated, do not edit manually)
 To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
 """
 
+import functools
+# json is needed on every hook call (the hook input arrives as JSON on
+# stdin), and json.decoder imports re itself, so neither is deferred
 import json
 import os
 import re
 import sys
+import time
 from pathlib import Path
 
+from stats import STATS
+
 # Directory constants
 AGENTS_DIR = '.agents'
 DECISIONS_DIR = 'decisions'
+CACHE_DIR = '.cache'
 AGD_PATTERN = 'AGD-*.md'
 
+# Generated index files (relative to .agents/)
+TAGS_INDEX = 'INDEX-TAGS.md'
+RELATIONS_INDEX = 'INDEX-AGD-RELATIONS.md'
+STATUS_INDEX = 'INDEX-AGD-STATUS.md'
+SUMMARY_INDEX = 'INDEX-SUMMARY.md'
+TAG_SHARDS_MANIFEST = 'index/tags.md'
+TAG_SHARDS_DIR = 'index/tags'
+INDEX_FILES = (TAGS_INDEX, RELATIONS_INDEX, STATUS_INDEX, SUMMARY_INDEX, TAG_SHARDS_MANIFEST)
+# Derived from source files rather than decisions, so not part of INDEX_FILES
+# (see code_refs.py)
+CODE_REFS_INDEX = 'INDEX-CODE-REFS.md'
+
+# Directories never walked when looking for projects or source files
+SKIPPED_DIRS = {'node_modules'}
+
 # Frontmatter field constants
+MAX_FRONTMATTER_BYTES = 64 * 1024
+_READ_CHUNK_SIZE = 4096
+WRITE_BUFFER_SIZE = 1024 * 1024
+_COMPARE_CHUNK_SIZE = 256 * 1024
 REF_FIELDS = ['obsoleted_by', 'updated_by', 'updates', 'obsoletes']
 
 # Relationship type constants (for index generation)
@@ -27,22 +53,107 @@ RELATION_FIELDS = [
     ('obsoletes', REL_OBSOLETES),
     ('updates', REL_UPDATES),
 ]
+REVERSE_RELATION_FIELDS = [
+    ('obsoleted_by', REL_OBSOLETES),
+    ('updated_by', REL_UPDATES),
+]
+
+# AGD number allocation (see allocate_agd_id())
+COUNTER_FILE = 'agd-counter.json'
+COUNTER_LOCK = 'agd-counter.lock'
+
+# Parallel loading (see worker_count())
+PARALLEL_THRESHOLD = 2000
+MAX_LOADER_THREADS = 8
 
+# Compiled on first use (most hook calls never need them) and then reused:
+# get_agd_id() and get_agd_sort_key() run per AGD
+AGD_ID_PATTERN = r'AGD-\d+'
+AGD_NUMBER_PATTERN = r'AGD-(\d+)'
 
-def get_project_dir() -> Path:
-    """Get project directory from CLAUDE_PROJECT_DIR env var or CLI argument.
 
-    Exits with error if neither is available.
+@functools.cache
+def _compiled(pattern: str) -> 're.Pattern[str]':
+    return re.compile(pattern)
+
+# Cross-project references in a workspace (see workspace.py): `pkg:AGD-012`
+PROJECT_REF_SEP = ':'
+
+
+def get_project_dir(args: list[str] | None = None) -> Path:
+    """Get project directory from the CLI argument or CLAUDE_PROJECT_DIR env var.
+
+    `args` defaults to sys.argv[1:]; the first argument not starting with
+    '-' is used, and overrides the env var. Exits with error if neither is
+    available. The result is recorded for the stats log (see stats.py).
     """
-    project_dir_str = os.environ.get('CLAUDE_PROJECT_DIR', '')
+    positional = [a for a in (sys.argv[1:] if args is None else args) if not a.startswith('-')]
+    project_dir_str = positional[0] if positional else os.environ.get('CLAUDE_PROJECT_DIR', '')
     if project_dir_str:
-        return Path(project_dir_str)
-    if len(sys.argv) >= 2:
-        return Path(sys.argv[1])
+        STATS.project_dir = Path(project_dir_str)
+        return STATS.project_dir
     print("Error: CLAUDE_PROJECT_DIR not set", file=sys.stderr)
     sys.exit(2)
 
 
+def pop_option(args: list[str], name: str) -> str | None:
+    """Remove `name VALUE` or `name=VALUE` from args and return VALUE.
+
+    Returns None if the option is absent; exits with an error if it has no value.
+    """
+    for i, arg in enumerate(args):
+        if arg.startswith(f"{name}="):
+            del args[i]
+            return arg[len(name) + 1:]
+        if arg == name:
+            if i + 1 >= len(args):
+                print(f"Error: {name} requires a value", file=sys.stderr)
+                sys.exit(1)
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+    return None
+
+
+def read_hook_input() -> dict:
+    """Read the hook JSON payload from stdin, returning {} if absent or invalid."""
+    try:
+        hook_input = json.load(sys.stdin)
+    except (json.JSONDecodeError, IOError):
+        return {}
+    return hook_input if isinstance(hook_input, dict) else {}
+
+
+def hook_file_path(hook_input: dict) -> str:
+    """file_path of a Write/Edit hook call, or '' if it has none (e.g. Bash)."""
+    tool_input = hook_input.get('tool_input') or {}
+    file_path = tool_input.get('file_path', '') if isinstance(tool_input, dict) else ''
+    return file_path if isinstance(file_path, str) else ''
+
+
+def hook_touches_decisions(project_dir: Path, hook_input: dict) -> bool:
+    """Whether a hook call may have changed AGD files.
+
+    Tool calls with a file_path outside the decisions directory cannot;
+    calls without one (e.g. Bash) might.
+    """
+    file_path = hook_file_path(hook_input)
+    if not file_path:
+        return True
+    return str(get_decisions_dir(project_dir)) in file_path
+
+
+def hook_agd_file(project_dir: Path, hook_input: dict) -> str | None:
+    """Name of the AGD file a Write/Edit hook call targeted, if any."""
+    file_path = hook_file_path(hook_input)
+    if not file_path:
+        return None
+    path = Path(file_path)
+    if path.parent != get_decisions_dir(project_dir) or not is_agd_filename(path.name):
+        return None
+    return path.name
+
+
 def load_config(config_path: Path) -> dict | None:
     """Load config.json, returning None on failure."""
     if not config_path.exists():
@@ -54,6 +165,126 @@ def load_config(config_path: Path) -> dict | None:
         return None
 
 
+def worker_count(config: dict, key: str, items: int, default: int = 0) -> int:
+    """Number of workers to use for `items` work units, or 0 for serial.
+
+    Reads config[key] (falling back to default) and stays serial below
+    config['parallelThreshold'] items, where pool startup outweighs the gain.
+    """
+    threshold = config.get('parallelThreshold', PARALLEL_THRESHOLD)
+    workers = config.get(key, default)
+    if not isinstance(workers, int) or not isinstance(threshold, int) or items < threshold:
+        return 0
+    return workers if workers > 1 else 0
+
+
+def parallel_map(func, items: list, workers: int) -> list:
+    """[func(item) for item in items], run on a thread pool when workers > 1.
+
+    Results keep the order of items regardless of completion order.
+    """
+    if workers <= 1:
+        return [func(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+def atomic_write_text(path: Path, content: str) -> None:
+    """Write content to path via a temp file and os.replace.
+
+    Readers never see a partially written file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _same_content(path_a: Path, path_b: Path) -> bool:
+    """Whether two files have identical bytes, compared chunk by chunk."""
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+            while True:
+                chunk = file_a.read(_COMPARE_CHUNK_SIZE)
+                if chunk != file_b.read(_COMPARE_CHUNK_SIZE):
+                    return False
+                if not chunk:
+                    return True
+    except OSError:
+        return False
+
+
+_encode_compact = json.JSONEncoder(separators=(',', ':')).encode
+
+
+class AtomicWriter:
+    """Buffered text writer for large files; like atomic_write_text() without
+    holding the content in memory.
+
+    Writes go to a temp file next to path, which commit() moves into place
+    with os.replace. With keep_unchanged, commit() leaves path (and its mtime)
+    alone if the new content is identical. Used as a context manager, it
+    commits on success and removes the temp file on error.
+    """
+
+    def __init__(self, path: Path, keep_unchanged: bool = False):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.keep_unchanged = keep_unchanged
+        self.replaced = False
+        self.tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        self.file = open(self.tmp_path, 'w', buffering=WRITE_BUFFER_SIZE)
+        self.write = self.file.write
+
+    def write_json(self, value, depth: int = 1) -> None:
+        """Write value as compact JSON (same bytes as json.dumps() with
+        separators=(',', ':')), dumping dicts entry by entry down to depth
+        so that only one entry is encoded in memory at a time."""
+        if depth <= 0 or not isinstance(value, dict):
+            self.write(_encode_compact(value))
+            return
+        self.write('{')
+        for i, (key, item) in enumerate(value.items()):
+            self.write(f'{"," if i else ""}{_encode_compact(key)}:')
+            self.write_json(item, depth - 1)
+        self.write('}')
+
+    def commit(self) -> bool:
+        """Close the file and move it into place. Returns whether path was replaced."""
+        try:
+            self.file.close()
+            if self.keep_unchanged and _same_content(self.tmp_path, self.path):
+                self.tmp_path.unlink()
+                return False
+            os.replace(self.tmp_path, self.path)
+            self.replaced = True
+            return True
+        except BaseException:
+            self.discard()
+            raise
+
+    def discard(self) -> None:
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> 'AtomicWriter':
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
 def parse_frontmatter(content: str) -> dict[str, str]:
     """Parse YAML frontmatter from markdown content."""
     if not content.startswith('---'):
@@ -63,8 +294,59 @@ def parse_frontmatter(content: str) -> dict[str, str]:
     if len(parts) < 3:
         return {}
 
+    return _parse_frontmatter_block(parts[1])
+
+
+def read_frontmatter(path: Path, max_bytes: int = MAX_FRONTMATTER_BYTES) -> dict[str, str]:
+    """Read and parse only the frontmatter of a markdown file.
+
+    Reads in small binary chunks and stops at the closing '---', so the body
+    is never loaded. Returns the same result as parse_frontmatter() on the
+    full content, except that a header not closed within max_bytes is
+    treated like one that is never closed: {} is returned, as for any
+    unterminated frontmatter. Raises ValueError if the header is not valid
+    UTF-8, and OSError on read failure.
+    """
+    started = time.perf_counter() if STATS.enabled else 0.0
+    with open(path, 'rb') as f:
+        data = bytearray(f.read(_READ_CHUNK_SIZE))
+        if not data.startswith(b'---'):
+            return {}
+
+        end = data.find(b'---', 3)
+        while end < 0:
+            if len(data) > max_bytes:
+                break
+            chunk = f.read(_READ_CHUNK_SIZE)
+            if not chunk:
+                return {}
+            start = max(3, len(data) - 2)
+            data += chunk
+            end = data.find(b'---', start)
+
+    if STATS.enabled:
+        read_done = time.perf_counter()
+        STATS.add_time('read', read_done - started)
+        STATS.count('bytes_read', len(data))
+
+    if end < 0 or end > max_bytes:
+        return {}
+
+    block = data[3:end].decode('utf-8')
+    if '\r' in block:
+        block = block.replace('\r\n', '\n').replace('\r', '\n')
+    frontmatter = _parse_frontmatter_block(block)
+
+    if STATS.enabled:
+        STATS.add_time('parse', time.perf_counter() - read_done)
+        STATS.count('files_parsed')
+    return frontmatter
+
+
+def _parse_frontmatter_block(block: str) -> dict[str, str]:
+    """Parse the text between the frontmatter delimiters."""
     frontmatter = {}
-    for line in parts[1].strip().split('\n'):
+    for line in block.strip().split('\n'):
         if ':' in line:
             key, value = line.split(':', 1)
             key = key.strip()
@@ -74,26 +356,135 @@ def parse_frontmatter(content: str) -> dict[str, str]:
     return frontmatter
 
 
+def is_agd_filename(name: str) -> bool:
+    """Whether name matches AGD_PATTERN (without fnmatch's per-call overhead)."""
+    return name.startswith('AGD-') and name.endswith('.md')
+
+
 def get_agd_id(filename: str) -> str | None:
     """Extract AGD ID from filename (e.g., AGD-001 from AGD-001_name.md)."""
-    match = re.match(r'(AGD-\d+)', filename)
-    return match.group(1) if match else None
+    match = _compiled(AGD_ID_PATTERN).match(filename)
+    return match.group() if match else None
+
+
+def split_project_ref(ref: str) -> tuple[str | None, str]:
+    """('pkg', 'AGD-012') for a cross-project reference `pkg:AGD-012`, else (None, ref)."""
+    project, sep, local_ref = ref.partition(PROJECT_REF_SEP)
+    return (project.strip(), local_ref.strip()) if sep else (None, ref)
 
 
 def get_agd_sort_key(path: str) -> int:
     """Extract AGD number as integer for sorting."""
-    match = re.search(r'AGD-(\d+)', path)
+    match = _compiled(AGD_NUMBER_PATTERN).search(path)
     return int(match.group(1)) if match else 0
 
 
-def find_agd_file(decisions_dir: Path, agd_ref: str) -> Path | None:
-    """Find AGD file by its number reference."""
-    agd_id = get_agd_id(agd_ref)
-    if not agd_id:
-        return None
+class AgdResolver:
+    """AGD ID to file map built from a single listing of the decisions directory.
+
+    Replaces globbing the directory once per reference. IDs claimed by more
+    than one file are kept in `duplicates` instead of silently picking the first.
+    """
+
+    def __init__(self, decisions_dir: Path, names: list[str] | None = None):
+        """List decisions_dir, or use names if the listing is already known."""
+        self.decisions_dir = decisions_dir
+        self.files: list[Path] = []
+        self.by_id: dict[str, Path] = {}
+        self.duplicates: dict[str, list[Path]] = {}
+
+        if names is None:
+            with STATS.phase('scan'):
+                try:
+                    with os.scandir(decisions_dir) as it:
+                        names = [e.name for e in it if is_agd_filename(e.name) and e.is_file()]
+                except OSError:
+                    names = []
+            if STATS.enabled:
+                STATS.count('dir_scans')
+
+        for name in sorted(names, key=lambda n: (get_agd_sort_key(n), n)):
+            path = decisions_dir / name
+            self.files.append(path)
+
+            agd_id = get_agd_id(name)
+            if not agd_id or name[len(agd_id):len(agd_id) + 1] != '_':
+                continue
+            if agd_id in self.by_id:
+                self.duplicates.setdefault(agd_id, [self.by_id[agd_id]]).append(path)
+            else:
+                self.by_id[agd_id] = path
+
+    def resolve(self, agd_ref: str) -> Path | None:
+        """Find AGD file by its number reference."""
+        agd_id = get_agd_id(agd_ref)
+        return self.by_id.get(agd_id) if agd_id else None
+
+
+def _highest_agd_number(decisions_dir: Path) -> int:
+    try:
+        with os.scandir(decisions_dir) as it:
+            return max((get_agd_sort_key(e.name) for e in it if is_agd_filename(e.name)), default=0)
+    except OSError:
+        return 0
+
+
+def allocate_agd_id(project_dir: Path, slug: str | None = None) -> tuple[str, Path | None]:
+    """Reserve the next AGD number. Returns (agd_id, placeholder path or None).
+
+    The highest number handed out is kept in .agents/.cache/agd-counter.json
+    together with the decisions directory mtime; the directory is only
+    rescanned when that mtime changed (files added by other means) or the
+    counter is missing. An exclusive lock makes concurrent callers receive
+    distinct numbers. With slug, AGD-NNN_<slug>.md is created as well.
+    """
+    decisions_dir = get_decisions_dir(project_dir)
+    cache_dir = get_cache_dir(project_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    counter_path = cache_dir / COUNTER_FILE
+
+    with open(cache_dir / COUNTER_LOCK, 'w') as lock:
+        try:
+            import fcntl
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except ImportError:
+            pass  # No advisory locks on this platform
 
-    matches = list(decisions_dir.glob(f'{agd_id}_*.md'))
-    return matches[0] if matches else None
+        try:
+            dir_mtime = os.stat(decisions_dir).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+
+        try:
+            with open(counter_path) as f:
+                counter = json.load(f)
+            last = int(counter['last'])
+            if counter.get('dir_mtime_ns') != dir_mtime:
+                last = max(last, _highest_agd_number(decisions_dir))
+        except (OSError, ValueError, KeyError, TypeError):
+            last = _highest_agd_number(decisions_dir)
+
+        path = None
+        while True:
+            last += 1
+            agd_id = f"AGD-{last:03d}"
+            if not slug:
+                break
+            decisions_dir.mkdir(parents=True, exist_ok=True)
+            path = decisions_dir / f"{agd_id}_{slug}.md"
+            title = slug.replace('-', ' ').capitalize()
+            try:
+                with open(path, 'x') as f:
+                    f.write(f'---\ntitle: "{title}"\ndescription: ""\ntags:\n---\n')
+                break
+            except FileExistsError:
+                continue
+
+        if path is not None:
+            dir_mtime = os.stat(decisions_dir).st_mtime_ns
+        atomic_write_text(counter_path, json.dumps({'last': last, 'dir_mtime_ns': dir_mtime}))
+
+    return agd_id, path
 
 
 def get_decisions_dir(project_dir: Path) -> Path:
@@ -104,3 +495,8 @@ def get_decisions_dir(project_dir: Path) -> Path:
 def get_agents_dir(project_dir: Path) -> Path:
     """Get the .agents directory path."""
     return project_dir / AGENTS_DIR
+
+
+def get_cache_dir(project_dir: Path) -> Path:
+    """Get the .agents/.cache directory path (gitignored, safe to delete)."""
+    return project_dir / AGENTS_DIR / CACHE_DIR
@@ -8,129 +8,151 @@ To disable auto-update, add this filename to disableAutoUpdateScripts in config.
 Usage:
     validate-agds.py                    # Auto-detect from CLAUDE_PROJECT_DIR
     validate-agds.py <project_dir>      # Manual override
-
-Called by PostToolUse hook after Write/Edit operations.
-Reads hook input from stdin to determine if validation is needed.
+    validate-agds.py --since <rev>      # Only AGDs related to changes since a git revision (CI, pre-commit)
+    validate-agds.py --workspace [root] [--jobs N]  # Every .agents tree under root (monorepo)
+    validate-agds.py --format json      # Errors as JSON on stdout (combines with the above)
+
+The registered PostToolUse hook is `agent-centric.py hook`, which validates
+and reindexes in one process; this script validates only. Piped hook input
+on stdin is honoured the same way: nothing is checked unless the tool call
+touched the decisions directory, and when it edited a single AGD file and
+the previous run was clean, only that file and the AGDs related to it are
+checked (see validate_scoped() in validation.py); otherwise every AGD is
+validated.
+
+With --since, stdin is not read; the changed files come from git (see
+git_changes.py) and errors already present at <rev> are not reported.
+
+With --workspace, stdin is not read either; each project found under root
+is validated in full, cross-project references (`pkg:AGD-012`) are
+checked, and errors are prefixed with the project's path (see workspace.py).
+
+With --format json, stdin is not read and every AGD is validated (unless
+nothing changed since the last clean run). Instead of the text report on
+stderr, one JSON object is printed on stdout:
+    {"valid": false, "errors": [{"project": null, "file": "AGD-001_x.md",
+      "line": null, "field": "tags", "kind": "invalid_tag", "value": "foo",
+      "message": "invalid tag 'foo' (not in config.tags)"}]}
+Exit codes are the same in both formats.
 
 Exit codes:
 - 0: Valid, all AGD files pass validation
+- 1: --since could not run git (not a repository, unknown revision), or
+     --workspace found no project
 - 2: Invalid, validation errors found (blocking - Claude will process)
 """
 
-import json
-import re
+from stats import run_main  # First, so that --stats can time the other imports
+
 import sys
 from pathlib import Path
 
-from utils import (
-    AGD_PATTERN,
-    REF_FIELDS,
-    find_agd_file,
-    get_agents_dir,
-    get_decisions_dir,
-    get_project_dir,
-    load_config,
-    parse_frontmatter,
-)
-
-
-def validate_tags(tags_str: str, allowed_tags: list[str], filename: str) -> list[str]:
-    """Validate that all tags are in the allowed list."""
-    if not tags_str:
-        return []
-
-    errors = []
-    tags = [t.strip() for t in tags_str.split(',') if t.strip()]
-    for tag in tags:
-        if tag not in allowed_tags:
-            errors.append(f"{filename}: invalid tag '{tag}' (not in config.tags)")
-    return errors
-
-
-def validate_references(frontmatter: dict, decisions_dir: Path, filename: str) -> list[str]:
-    """Validate that all AGD references point to existing files."""
-    errors = []
-
-    for field in REF_FIELDS:
-        if field not in frontmatter or not frontmatter[field]:
-            continue
+from corpus import AgdError, Corpus, load_corpus
+from fingerprint import FingerprintStore, corpus_fingerprint, stat_decisions, with_code_refs
+from utils import get_project_dir, hook_agd_file, hook_touches_decisions, pop_option, read_hook_input
+from validation import errors_json, report_errors, save_reference_map, validate_corpus, validate_scoped
 
-        refs = [r.strip() for r in frontmatter[field].split(',') if r.strip()]
-        for ref in refs:
-            ref_match = re.match(r'(AGD-\d+)', ref)
-            if not ref_match:
-                errors.append(f"{filename}: invalid reference format '{ref}' in {field}")
-                continue
+FORMATS = ('text', 'json')
 
-            if not find_agd_file(decisions_dir, ref):
-                errors.append(f"{filename}: {field} references non-existent {ref_match.group(1)}")
 
-    return errors
+def report(errors: list[AgdError], output: str) -> int:
+    """Print errors in the given format. Returns the exit code."""
+    if output == 'json':
+        print(errors_json(errors))
+    elif errors:
+        report_errors(errors)
+    return 2 if errors else 0
 
 
-def validate_all_decisions(project_dir: Path) -> list[str]:
-    """Validate all AGD files in the decisions directory."""
-    errors = []
-    decisions_dir = get_decisions_dir(project_dir)
-    config_path = get_agents_dir(project_dir) / 'config.json'
+def validate_since(project_dir: Path, rev: str, output: str) -> int:
+    """Validate the AGDs related to changes since rev. Returns the exit code."""
+    from git_changes import GitError, load_changes
 
-    if not decisions_dir.exists():
+    try:
+        changes = load_changes(project_dir, rev)
+    except GitError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    # The resolver covers the whole directory: only report duplicate IDs
+    # claimed by a file that was parsed, so duplicates already present at
+    # rev are left alone
+    names = {record.name for record in changes.corpus.records}
+    related_ids = {agd_id for agd_id, paths in changes.corpus.resolver.duplicates.items()
+                   if any(path.name in names for path in paths)}
+    errors = [e for e in validate_corpus(changes.corpus) if e.kind != 'duplicate_id' or e.value in related_ids]
+    return report(errors, output)
+
+
+def validate_workspace(root: Path, jobs: int, output: str) -> int:
+    """Validate every project under root together. Returns the exit code."""
+    from workspace import find_projects, prefix_errors, project_ids, run_projects
+
+    projects = find_projects(root)
+    if not projects:
+        print(f"Error: no .agents/config.json found under {root}", file=sys.stderr)
+        return 1
+
+    corpora = run_projects(lambda project: load_corpus(project.path), projects, jobs)
+    ids = project_ids(projects, corpora)
+
+    def validate(corpus: Corpus) -> list[AgdError]:
+        errors = validate_corpus(corpus, ids)
+        save_reference_map(corpus, errors)
         return errors
 
-    config = load_config(config_path)
-    allowed_tags = config.get('tags', []) if config else []
-
-    for agd_file in decisions_dir.glob(AGD_PATTERN):
-        try:
-            content = agd_file.read_text()
-        except IOError as e:
-            errors.append(f"{agd_file.name}: cannot read file - {e}")
-            continue
-
-        frontmatter = parse_frontmatter(content)
-
-        if 'tags' in frontmatter:
-            errors.extend(validate_tags(frontmatter['tags'], allowed_tags, agd_file.name))
-
-        errors.extend(validate_references(frontmatter, decisions_dir, agd_file.name))
-
-    return errors
+    errors = []
+    for project, project_errors in zip(projects, run_projects(validate, corpora, jobs)):
+        errors.extend(prefix_errors(project, project_errors))
+    return report(errors, output)
 
 
 def main():
-    project_dir = get_project_dir()
-
-    try:
-        hook_input = json.load(sys.stdin)
-    except (json.JSONDecodeError, IOError):
-        hook_input = {}
-
-    tool_input = hook_input.get('tool_input', {})
-    file_path = tool_input.get('file_path', '')
+    args = sys.argv[1:]
+    since = pop_option(args, '--since')
+    output = pop_option(args, '--format') or 'text'
+    if output not in FORMATS:
+        print(f"Error: --format must be one of {', '.join(FORMATS)}", file=sys.stderr)
+        sys.exit(1)
+
+    if '--workspace' in args:
+        if since is not None:
+            print("Error: --since cannot be combined with --workspace", file=sys.stderr)
+            sys.exit(1)
+        from workspace import pop_jobs
+        jobs = pop_jobs(args)
+        sys.exit(validate_workspace(get_project_dir(args), jobs, output))
+
+    project_dir = get_project_dir(args)
+    if since is not None:
+        sys.exit(validate_since(project_dir, since, output))
 
     # Only validate if the operation was on an AGD file
-    if file_path:
-        decisions_path = str(get_decisions_dir(project_dir))
-        if decisions_path not in file_path:
-            sys.exit(0)
-
-    errors = validate_all_decisions(project_dir)
-
-    if errors:
-        print("\n⚠️  AGD VALIDATION ERRORS", file=sys.stderr)
-        print("=" * 50, file=sys.stderr)
-        for error in errors:
-            print(f"  - {error}", file=sys.stderr)
-        print("\n📋 To fix tag errors:", file=sys.stderr)
-        print("   1. Add missing tags to .agents/config.json", file=sys.stderr)
-        print("   2. Or update the AGD file to use existing tags", file=sys.stderr)
-        print("\n📋 To fix reference errors:", file=sys.stderr)
-        print("   Check that referenced AGD files exist", file=sys.stderr)
-        print("=" * 50, file=sys.stderr)
-        sys.exit(2)
-
-    sys.exit(0)
+    hook_input = read_hook_input() if output == 'text' else {}
+    if not hook_touches_decisions(project_dir, hook_input):
+        sys.exit(0)
+
+    # Skip parsing entirely if nothing changed since the last clean run
+    store = FingerprintStore(project_dir)
+    entries = stat_decisions(project_dir)
+    fingerprint = corpus_fingerprint(project_dir, entries)
+    sources, code_refs = with_code_refs(project_dir, fingerprint)
+    if store.matches('validate', sources):
+        sys.exit(report([], output))
+
+    changed = hook_agd_file(project_dir, hook_input)
+    errors = validate_scoped(project_dir, changed, entries) if changed and entries is not None else None
+    if errors is None:
+        corpus = load_corpus(project_dir, fingerprint=fingerprint)
+        if code_refs is not None:
+            corpus.code_refs = code_refs  # The scan the fingerprint was taken from
+        errors = validate_corpus(corpus)
+        save_reference_map(corpus, errors)
+
+    if not errors:
+        store.store('validate', sources)
+    sys.exit(report(errors, output))
 
 
 if __name__ == '__main__':
-    main()
+    run_main('validate-agds', main)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+AGD validation rules.
+
+Managed by: agent-centric skill (auto-updated, do not edit manually)
+To disable auto-update, add this filename to disableAutoUpdateScripts in config.json.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from cache import file_signature
+from corpus import AgdError, AgdRecord, Corpus
+from refmap import ReferenceMap, claimed_ids, config_signature
+from stats import STATS
+from utils import (
+    REF_FIELDS,
+    AgdResolver,
+    get_agd_id,
+    get_agents_dir,
+    get_decisions_dir,
+    load_config,
+    read_frontmatter,
+    split_project_ref,
+    worker_count,
+)
+
+
+def validate_tags(tags_str: str, allowed_tags: list[str], filename: str) -> list[AgdError]:
+    """Validate that all tags are in the allowed list."""
+    if not tags_str:
+        return []
+
+    errors = []
+    tags = [t.strip() for t in tags_str.split(',') if t.strip()]
+    for tag in tags:
+        if tag not in allowed_tags:
+            errors.append(AgdError(filename, 'invalid_tag', f"invalid tag '{tag}' (not in config.tags)",
+                                   'tags', tag))
+    return errors
+
+
+def validate_references(frontmatter: dict, resolver: AgdResolver, filename: str,
+                        projects: dict[str, set[str] | None] | None = None) -> list[AgdError]:
+    """Validate that all AGD references point to existing files.
+
+    References to other projects (`pkg:AGD-012`) are checked against
+    projects (see project_ids() in workspace.py) when given, else skipped.
+    """
+    errors = []
+
+    for field in REF_FIELDS:
+        if field not in frontmatter or not frontmatter[field]:
+            continue
+
+        refs = [r.strip() for r in frontmatter[field].split(',') if r.strip()]
+        if STATS.enabled:
+            STATS.count('refs_resolved', len(refs))
+        for ref in refs:
+            project, local_ref = split_project_ref(ref)
+            ref_id = get_agd_id(local_ref)
+            if not ref_id or project == '':
+                errors.append(AgdError(filename, 'invalid_reference', f"invalid reference format '{ref}' in {field}",
+                                       field, ref))
+                continue
+
+            if project is None:
+                if not resolver.resolve(ref):
+                    errors.append(AgdError(filename, 'missing_reference', f"{field} references non-existent {ref_id}",
+                                           field, ref_id))
+            elif projects is not None:
+                if project not in projects:
+                    errors.append(AgdError(filename, 'unknown_project', f"{field} references unknown project '{project}'",
+                                           field, ref))
+                elif projects[project] is None:
+                    errors.append(AgdError(filename, 'ambiguous_project',
+                                           f"{field} references ambiguous project '{project}' "
+                                           f"(set projectName in its config.json)", field, ref))
+                elif ref_id not in projects[project]:
+                    errors.append(AgdError(filename, 'missing_reference',
+                                           f"{field} references non-existent {project}:{ref_id}",
+                                           field, f"{project}:{ref_id}"))
+
+    return errors
+
+
+def validate_duplicates(resolver: AgdResolver) -> list[AgdError]:
+    """Report AGD IDs that are claimed by more than one file."""
+    errors = []
+    for agd_id, paths in resolver.duplicates.items():
+        for path in paths[1:]:
+            errors.append(AgdError(path.name, 'duplicate_id', f"duplicate {agd_id} (already used by {paths[0].name})",
+                                   value=agd_id))
+    return errors
+
+
+def validate_records(records: list[AgdRecord], allowed_tags: list[str], resolver: AgdResolver,
+                     projects: dict[str, set[str] | None] | None = None) -> list[AgdError]:
+    """Validate the tags and references of each record, in order."""
+    errors = []
+    for record in records:
+        if record.error:
+            errors.append(AgdError(record.name, 'unreadable', f"cannot read file - {record.error}"))
+            continue
+
+        if 'tags' in record.frontmatter:
+            errors.extend(validate_tags(record.frontmatter['tags'], allowed_tags, record.name))
+
+        errors.extend(validate_references(record.frontmatter, resolver, record.name, projects))
+
+    return errors
+
+
+def validate_corpus(corpus: Corpus, projects: dict[str, set[str] | None] | None = None) -> list[AgdError]:
+    """Validate all AGD files of a loaded corpus.
+
+    projects resolves cross-project references (see validate_references()).
+
+    With `validatorProcesses` set in config.json, large corpora are split
+    into contiguous chunks validated on a process pool; the chunks' errors
+    are concatenated in order, so the result matches a serial run.
+
+    With `codeReferences` set, AGD citations in source code are checked last
+    (see code_refs.py).
+    """
+    with STATS.phase('validate'):
+        return _validate_corpus(corpus, projects)
+
+
+def _validate_corpus(corpus: Corpus, projects: dict[str, set[str] | None] | None) -> list[AgdError]:
+    errors = []
+    if not corpus.exists:
+        return errors
+
+    errors.extend(validate_duplicates(corpus.resolver))
+    errors.extend(corpus.graph.errors())
+
+    records = corpus.records
+    processes = worker_count(corpus.config, 'validatorProcesses', len(records))
+    if not processes:
+        errors.extend(validate_records(records, corpus.allowed_tags, corpus.resolver, projects))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+
+        chunk_size = -(-len(records) // (processes * 4))
+        chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for chunk_errors in pool.map(validate_records, chunks,
+                                         repeat(corpus.allowed_tags), repeat(corpus.resolver),
+                                         repeat(projects)):
+                errors.extend(chunk_errors)
+
+    if corpus.config.get('codeReferences'):
+        from code_refs import validate_code_refs
+        errors.extend(validate_code_refs(corpus))
+    return errors
+
+
+def validate_scoped(project_dir: Path, name: str, entries: dict[str, list[int] | None]) -> list[AgdError] | None:
+    """Validate after a hook edited the single AGD file `name`.
+
+    entries is the decisions listing from stat_decisions() (fingerprint.py).
+    Checks that file's tags and references and the relations of every AGD
+    connected to it by references, using the cached reference map (see
+    refmap.py) instead of reading the other files. The errors equal those of
+    validate_corpus(). Returns None when that cannot be guaranteed and a full
+    validation is needed: no clean map from the previous run, config.json
+    changed, the file was deleted or renamed, another file changed, the
+    file's number is a duplicate, or code references are enabled (a status
+    change can affect citations anywhere).
+    """
+    with STATS.phase('validate'):
+        return _validate_scoped(project_dir, name, entries)
+
+
+def _validate_scoped(project_dir: Path, name: str, entries: dict[str, list[int] | None]) -> list[AgdError] | None:
+    if name not in entries:
+        return None  # Deleted or renamed
+    refmap = ReferenceMap.load(project_dir)
+    agents_dir = get_agents_dir(project_dir)
+    if (refmap is None or not refmap.clean or not refmap.unchanged_except(entries, name)
+            or refmap.config != config_signature(agents_dir / 'config.json')):
+        return None
+
+    config = load_config(agents_dir / 'config.json') or {}
+    if config.get('codeReferences'):
+        return None
+
+    # The previous run was clean, so a duplicate number can only involve this file
+    claims = claimed_ids(entries)
+    if len(claims.get(get_agd_id(name) or '', ())) > 1:
+        return None
+
+    decisions_dir = get_decisions_dir(project_dir)
+    path = decisions_dir / name
+    try:
+        record = AgdRecord(path, read_frontmatter(path), signature=file_signature(path))
+    except (OSError, ValueError) as e:
+        record = AgdRecord(path, error=str(e))
+    refmap.update(record, entries[name])
+
+    # The component is closed under references, so resolving within it
+    # gives the same results as resolving against the whole directory
+    members = refmap.component(name, {agd_id: names[0] for agd_id, names in claims.items()})
+    resolver = AgdResolver(decisions_dir, members)
+    records = [record if member == name else AgdRecord(decisions_dir / member, refmap.refs.get(member, {}))
+               for member in members]
+    corpus = Corpus(project_dir, agents_dir, decisions_dir, config, resolver, records)
+
+    errors = corpus.graph.errors()
+    errors.extend(validate_records([record], corpus.allowed_tags, resolver))
+
+    refmap.clean = not errors
+    refmap.save()
+    return errors
+
+
+def save_reference_map(corpus: Corpus, errors: list[AgdError]) -> None:
+    """Record the outcome of a full validation for later validate_scoped() calls."""
+    if corpus.exists:
+        ReferenceMap.build(corpus, clean=not errors).save()
+
+
+def format_errors(errors: list[AgdError]) -> str:
+    """Format validation errors with fix hints."""
+    lines = ["", "⚠️  AGD VALIDATION ERRORS", "=" * 50]
+    lines += [f"  - {error}" for error in errors]
+    lines += [
+        "",
+        "📋 To fix tag errors:",
+        "   1. Add missing tags to .agents/config.json",
+        "   2. Or update the AGD file to use existing tags",
+        "",
+        "📋 To fix reference errors:",
+        "   Check that referenced AGD files exist",
+        "   and that each AGD number is used by only one file",
+        "",
+        "📋 To fix relation errors:",
+        "   obsoleted_by/updated_by must match the other AGD's obsoletes/updates,",
+        "   and no AGD may (transitively) obsolete or update itself",
+    ]
+    if any(error.line for error in errors):
+        lines += [
+            "",
+            "📋 To fix citation errors (file:line):",
+            "   Cite an existing AGD that is still in force",
+            "   (see INDEX-AGD-STATUS.md for the successor of an obsoleted one)",
+        ]
+    lines.append("=" * 50)
+    return '\n'.join(lines)
+
+
+def report_errors(errors: list[AgdError]) -> None:
+    """Print validation errors with fix hints to stderr."""
+    print(format_errors(errors), file=sys.stderr)
+
+
+def errors_json(errors: list[AgdError]) -> str:
+    """`--format json` output: {"valid": bool, "errors": [AgdError.to_dict(), ...]}."""
+    return json.dumps({'valid': not errors, 'errors': [error.to_dict() for error in errors]}, ensure_ascii=False)